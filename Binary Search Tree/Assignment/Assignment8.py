@@ -9,6 +9,7 @@ class Tree:
             self._element = element
             self._left = left
             self._right = right
+            self._size = 1                    # number of nodes in the subtree rooted here
 
         def element(self):
             return self._element
@@ -191,6 +192,7 @@ class Tree:
             raise ValueError('Left child exists')
         self._size += 1
         node._left = self.TreeNode(e, node)             # node is its parent
+        self._update_sizes(node, 1)
         return node._left
 
     def add_right(self, node, e):
@@ -203,8 +205,15 @@ class Tree:
             raise ValueError('Right child exists')
         self._size += 1
         node._right = self.TreeNode(e, node)            # node is its parent
+        self._update_sizes(node, 1)
         return node._right
 
+    def _update_sizes(self, node, delta):
+        """Add delta to the subtree size of node and of every ancestor of node."""
+        while node is not None:
+            node._size += delta
+            node = node._parent
+
     def _replace(self, node, e):
         """Replace the element at given node with e, and return the old element."""
         old = node._element
@@ -230,6 +239,7 @@ class Tree:
                 parent._left = child
             else:
                 parent._right = child
+        self._update_sizes(node._parent, -1)   # None when the root was deleted
         self._size -= 1
         return node._element
 
@@ -247,6 +257,7 @@ class Tree:
         if not type(self) is type(t1) is type(t2):    # all 3 trees must be same type
             raise TypeError('Tree types must match')
         self._size += len(t1) + len(t2)
+        self._update_sizes(node, len(t1) + len(t2))
         if not t1.is_empty():         # attached t1 as left subtree of node
             t1._root._parent = node
             node._left = t1._root
@@ -404,6 +415,50 @@ class BinarySearchTree(Tree):
             yield node._element
             node = self.before(node)
 
+    #--------------------- order statistics (uses subtree sizes) ---------------------
+    def _subtree_size(self, node):
+        """Return the number of nodes in the subtree rooted at node (0 for None)."""
+        return node._size if node is not None else 0
+
+    def select(self, k):
+        """Return the node holding the k-th smallest value (k = 1 is the first node).
+
+        Raise IndexError if k is not in 1 .. len(self).
+        """
+        if not 1 <= k <= len(self):
+            raise IndexError('k out of range: ' + repr(k))
+        node = self._root
+        while True:
+            left = self._subtree_size(node._left)
+            if k <= left:                         # answer is in the left subtree
+                node = node._left
+            elif k == left + 1:                   # answer is this node
+                return node
+            else:                                 # skip left subtree and this node
+                k -= left + 1
+                node = node._right
+
+    def rank(self, v):
+        """Return the number of values in the tree that are smaller than v."""
+        r = 0
+        node = self._root
+        while node is not None:
+            if node._element < v:                 # node and its left subtree are smaller
+                r += self._subtree_size(node._left) + 1
+                node = node._right
+            else:
+                node = node._left
+        return r
+
+    def kth_largest(self, k):
+        """Return the node holding the k-th largest value (k = 1 is the last node).
+
+        Raise IndexError if k is not in 1 .. len(self).
+        """
+        if not 1 <= k <= len(self):
+            raise IndexError('k out of range: ' + repr(k))
+        return self.select(len(self) - k + 1)
+
 
     def largest_to_smallest(self):
         """
@@ -470,10 +525,7 @@ class BinarySearchTree(Tree):
         elif k > self._size:
             return self.first()
         else:
-            node = self.last()
-            for i in range(k-1):
-                node = self.before(node)
-            return node
+            return self.kth_largest(k)            # O(h) using subtree sizes
 
     def LCA(self, node1, node2):
         """
@@ -634,6 +686,9 @@ def main():
     print("Your answer:", bst.get_kth_largest(7)._element, ", should be 2")
     print("Testing problem 7 find k-th largest... 9th largest is")
     print("Your answer:", bst.get_kth_largest(9)._element, ", should be 2")
+    print("select(1) is", bst.select(1)._element, ", should be 2")
+    print("rank(12) is", bst.rank(12), ", should be 4")
+    print("kth_largest(2) is", bst.kth_largest(2)._element, ", should be 15")
 
     print("#-------------------------- Problem 4 lowest common ancestor tests... --------------------------")
     bst = BinarySearchTree()
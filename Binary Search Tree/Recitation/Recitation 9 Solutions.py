@@ -15,7 +15,15 @@
         return True 
     
     def iter_range(self, start, stop):
-        for i in self:  # calls inorder()
-            if start <= i < stop:
-                yield i
+        node = self._root               # descend to the first value >= start
+        first = None
+        while node is not None:
+            if node.element() >= start:
+                first = node
+                node = node._left
+            else:
+                node = node._right
+        while first is not None and first.element() < stop:   # then walk successors
+            yield first.element()
+            first = self.after(first)
 
@@ -1,3 +1,6 @@
+import operator
+from keyword import iskeyword
+
 class Empty(Exception):
     def __init__(self, msg):
         self.msg = msg
@@ -262,26 +265,61 @@ class Tree:
 
     #---------------------------------- Problems ---------------------------------
 
-    def has_duplicate(self):
+    def has_duplicate(self, approximate = False):
         """
         :self: Tree -- a binary Tree.
+        :approximate: Boolean -- use the memory-bounded Bloom filter mode (see duplicates).
         :return: True if self BinaryTree contains duplicate values. False otherwise
         """
         # Task 1
-        l = []
-        return self.duplicate(self._root,l)
+        return len(self.duplicates(approximate, limit = 1)) > 0
 
-    def duplicate(self,node,l):
-        '''
-        additional function for Task 1
-        '''
-        if node is None:
-            return False
-        elif node._element in l:
-            return True
-        l.append(node._element)
-        return self.duplicate(node._left,l) or self.duplicate(node._right,l)
+    def duplicates(self, approximate = False, bits = None, limit = None):
+        """Return the set of values stored more than once (at most limit of them, if given).
 
+        Exact mode keeps every value seen in a hash set: one pass, O(n) time and memory.
+        Approximate mode is for trees too large for that set: the first pass only records
+        each value in a Bloom filter of the given number of bits (10 per node by default),
+        and any value the filter may have seen before becomes a candidate; the second pass
+        counts the candidates exactly, so the result is still exact and the memory is the
+        filter plus the (few) candidates.
+        """
+        found = set()
+        if not approximate:
+            seen = set()
+            for e in self._elements():
+                if e in seen:
+                    found.add(e)
+                    if limit is not None and len(found) >= limit:
+                        break
+                seen.add(e)
+            return found
+        seen = BloomFilter(bits if bits is not None else 10 * len(self))
+        candidates = set()
+        for e in self._elements():
+            if seen.add(e):                              # maybe seen before (or a false positive)
+                candidates.add(e)
+        if candidates:
+            counted = set()
+            for e in self._elements():                   # second pass: verify the candidates
+                if e in candidates:
+                    if e in counted:
+                        found.add(e)
+                        if limit is not None and len(found) >= limit:
+                            break
+                    counted.add(e)
+        return found
+
+    def _elements(self):
+        """Generate every element in preorder, using an explicit stack instead of recursion."""
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            yield node._element
+            if node._right is not None:
+                stack.append(node._right)
+            if node._left is not None:
+                stack.append(node._left)
 
     def is_height_balanced(self):
         """
@@ -289,26 +327,36 @@ class Tree:
         :return: True if self BinaryTree is height balanced. False otherwise.
         """
         # Task 2
-        return self.balanced(self._root)
-
-    def balanced(self,node):
-        '''
-        additional function for Task 2
-        '''
-        if self.newheight(node) == -1:
-            return True
-        elif abs(self.newheight(node._left) - self.newheight(node._right)) > 1:
-            return False
-        else:
-            return self.balanced(node._left) and self.balanced(node._right)
+        return self.height_and_balance(self._root)[1]
+
+    def height_and_balance(self, node):
+        """Return (height, balanced) for the subtree rooted at node (height -1 for None).
 
-    def newheight(self,node):
-        '''
-        additional function for Task 2
-        '''
+        One postorder pass with an explicit stack: each child's height is computed once
+        and reused by its parent, so the check is O(n) and deep trees cannot hit the
+        recursion limit. It stops at the first subtree that is out of balance; then
+        (height of that subtree, False) is returned.
+        """
         if node is None:
-            return -1
-        return self.height(node)
+            return -1, True
+        heights = []                                     # heights of finished subtrees not yet used
+        stack = [(node, False)]                          # (node, children already finished?)
+        while stack:
+            walk, done = stack.pop()
+            if not done:
+                stack.append((walk, True))
+                if walk._right is not None:              # pushed first, so the left child finishes first
+                    stack.append((walk._right, False))
+                if walk._left is not None:
+                    stack.append((walk._left, False))
+            else:
+                right = heights.pop() if walk._right is not None else -1
+                left = heights.pop() if walk._left is not None else -1
+                height = 1 + max(left, right)
+                if abs(left - right) > 1:
+                    return height, False                 # early exit
+                heights.append(height)
+        return heights.pop(), True
 
     def sum_of_leaves(self):
         """
@@ -323,23 +371,26 @@ class Tree:
         return sum_leaves
 
 
-    def evaluate(self):
+    def evaluate(self, variables = None):
         """
         :self: Tree -- a binary Tree. (expression tree only)
+        :variables: dict -- value of each variable name used at a leaf (if any).
         Evaluates self Expression Tree. You can assume this function is called only on Expression Binary Trees.
 
         :return: Float result value for evaluating self Tree.
         """
         # Task 6
-        return self.evaluating(self._root)
+        return self.evaluating(self._root, variables)
 
-    def evaluating(self,node):
+    def evaluating(self, node, variables = None):
         if node is None:
             return 0
         elif self.is_leaf(node):
+            if isinstance(node._element, str):           # a variable
+                return variables[node._element]
             return node._element
-        left = self.evaluating(node._left)
-        right = self.evaluating(node._right)
+        left = self.evaluating(node._left, variables)
+        right = self.evaluating(node._right, variables)
         if node._element == "+":
             return left + right
         elif node._element == "-":
@@ -349,6 +400,201 @@ class Tree:
         elif node._element == "/":
             return left / right
 
+    #---------------------------------- compiled expression trees ---------------------------------
+    def compile(self):
+        """Return a Python function computing this expression tree, for repeated evaluation.
+
+        The function takes the variable names used at the leaves as parameters, in
+        sorted order, so it can be called as f(1, 2) or f(x=1, y=2). The tree is turned
+        into one Python expression and compiled once, so a call does no per-node
+        dispatch at all. Trees too deep for the Python compiler fall back to a flat
+        postfix program run on a stack (still no operator string comparisons).
+        Raise ValueError for a leaf that is neither a number nor a variable name,
+        or an inner node that is not one of + - * /.
+        """
+        program, names = self.postfix_program()
+        prefix = '_c'
+        while any(name.startswith(prefix) for name in names):
+            prefix = '_' + prefix                        # constant names must not hide a variable
+        body, constants = self._python_source(program, prefix)
+        source = 'lambda %s: %s' % (', '.join(names), body)
+        try:
+            return eval(compile(source, '<expression tree>', 'eval'), constants)
+        except (SyntaxError, RecursionError, MemoryError):     # nesting too deep for the compiler
+            return _postfix_function(program, names)
+
+    def postfix_program(self):
+        """Return (program, names): the tree as a flat postfix instruction list, and its sorted variable names.
+
+        Each instruction is (_CONSTANT, value), (_VARIABLE, name) or (_OPERATOR, (symbol, function)).
+        The tree is walked once, in postorder with an explicit stack.
+        """
+        program = []
+        names = set()
+        if self._root is None:
+            return [(_CONSTANT, 0)], []
+        stack = [(self._root, False)]                    # (node, children already emitted?)
+        while stack:
+            node, done = stack.pop()
+            if node is None:
+                program.append((_CONSTANT, 0))           # a missing child counts as 0, as in evaluate
+            elif self.is_leaf(node):
+                e = node._element
+                if isinstance(e, str):
+                    if not e.isidentifier() or iskeyword(e):
+                        raise ValueError('Bad variable name: ' + repr(e))
+                    names.add(e)
+                    program.append((_VARIABLE, e))
+                elif isinstance(e, (int, float)) and not isinstance(e, bool):
+                    program.append((_CONSTANT, e))
+                else:
+                    raise ValueError('Bad leaf: ' + repr(e))
+            elif done:
+                if node._element not in _OPERATORS:
+                    raise ValueError('Bad operator: ' + repr(node._element))
+                program.append((_OPERATOR, (node._element, _OPERATORS[node._element][1])))
+            else:
+                stack.append((node, True))
+                stack.append((node._right, False))       # pushed first, so the left operand comes first
+                stack.append((node._left, False))
+        return program, sorted(names)
+
+    def evaluate_columns(self, columns, chunk = 16384):
+        """Evaluate the expression tree for every row of columns at once; return a NumPy array.
+
+        columns maps each variable name to a 1-D array (all of the same length). The rows
+        are processed in blocks of chunk rows, small enough for the temporaries to stay
+        in cache, and each operator node costs one NumPy ufunc call per block, writing
+        into reusable buffers. NumPy arithmetic applies: integers are fixed width, and
+        division by zero gives inf/nan (with a warning) instead of raising.
+        Raise KeyError for a variable missing from columns, and ValueError if the
+        columns differ in length (or there is none to give it).
+        """
+        import numpy as np
+        program, names = self.postfix_program()
+        for name in names:
+            if name not in columns:
+                raise KeyError('Not found: ' + repr(name))
+        arrays = {name: np.asarray(columns[name]) for name in columns}
+        lengths = {len(a) for a in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError('Columns must have one common length')
+        n = lengths.pop()
+        constants = [arg for kind, arg in program if kind == _CONSTANT]
+        dtype = np.result_type(*[arrays[name] for name in names], *constants)
+        if any(kind == _OPERATOR and arg[0] == '/' for kind, arg in program):
+            dtype = np.result_type(dtype, np.float64)        # true division
+        ufuncs = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.true_divide}
+        result = np.empty(n, dtype)
+        free = []                                            # spare buffers of chunk rows
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            stack = []                                       # (operand, is one of our buffers?)
+            for kind, arg in program:
+                if kind == _CONSTANT:
+                    stack.append((arg, False))
+                elif kind == _VARIABLE:
+                    stack.append((arrays[arg][start:stop], False))
+                else:
+                    right, right_owned = stack.pop()
+                    left, left_owned = stack.pop()
+                    if left_owned:                           # overwrite an operand we own
+                        out = left
+                    elif right_owned:
+                        out = right
+                    else:
+                        out = (free.pop() if free else np.empty(chunk, dtype))[:stop - start]
+                    ufuncs[arg[0]](left, right, out=out)
+                    if right_owned and out is not right:
+                        free.append(right.base)              # right's buffer is free again
+                    stack.append((out, True))
+            value, owned = stack.pop()
+            result[start:stop] = value                       # a constant expression broadcasts
+            if owned:
+                free.append(value.base)
+        return result
+
+    def _python_source(self, program, prefix):
+        """Return (source, constants): Python source for a postfix program, with only the parentheses it needs.
+
+        Constants appear in the source as names prefix0, prefix1, ... and constants maps
+        those names to the values (repr would not do: inf and nan are not literals).
+        """
+        stack = []                                       # (source, precedence) of finished operands
+        constants = {}
+        for kind, arg in program:
+            if kind == _CONSTANT:
+                name = prefix + str(len(constants))
+                constants[name] = arg
+                stack.append((name, 3))
+            elif kind == _VARIABLE:
+                stack.append((arg, 3))
+            else:
+                symbol = arg[0]
+                precedence = _OPERATORS[symbol][0]
+                right, right_precedence = stack.pop()
+                left, left_precedence = stack.pop()
+                if left_precedence < precedence:
+                    left = '(' + left + ')'
+                if right_precedence <= precedence:       # keeps the tree's grouping for - and /
+                    right = '(' + right + ')'
+                stack.append((left + ' ' + symbol + ' ' + right, precedence))
+        return stack.pop()[0], constants
+
+
+_CONSTANT, _VARIABLE, _OPERATOR = 0, 1, 2               # postfix instruction kinds
+_OPERATORS = {'+': (1, operator.add), '-': (1, operator.sub),     # symbol -> (precedence, function)
+              '*': (2, operator.mul), '/': (2, operator.truediv)}
+
+def _postfix_function(program, names):
+    """Return a function running a postfix program on a stack (the fallback of Tree.compile)."""
+    def run(*args, **kwargs):
+        bindings = dict(zip(names, args))
+        bindings.update(kwargs)
+        stack = []
+        push, pop = stack.append, stack.pop
+        for kind, arg in program:
+            if kind == _CONSTANT:
+                push(arg)
+            elif kind == _VARIABLE:
+                push(bindings[arg])
+            else:
+                right = pop()
+                push(arg[1](pop(), right))
+        return pop()
+    return run
+
+
+class BloomFilter:
+    """Set of values in a fixed number of bits, which may report false positives but no false negatives.
+
+    Each value sets hashes bits, chosen by double hashing; with 10 bits per value and
+    7 hashes about 1% of new values are wrongly reported as already present.
+    """
+    def __init__(self, bits, hashes = 7):
+        self._bits = max(bits, 8)
+        self._hashes = hashes
+        self._array = bytearray((self._bits + 7) // 8)
+
+    def _positions(self, value):
+        h1 = hash(value)
+        h2 = hash((value, 0x9e3779b9)) | 1               # second, independent hash (made odd)
+        for i in range(self._hashes):
+            yield (h1 + i * h2) % self._bits
+
+    def add(self, value):
+        """Add value; return True if it may have been added before (all its bits were set)."""
+        present = True
+        array = self._array
+        for p in self._positions(value):
+            byte, mask = p >> 3, 1 << (p & 7)
+            if not array[byte] & mask:
+                present = False
+                array[byte] |= mask
+        return present
+
+    def __contains__(self, value):
+        return all(self._array[p >> 3] & (1 << (p & 7)) for p in self._positions(value))
 
 
 def is_isomorphic(tree1, tree2):
@@ -359,17 +605,50 @@ def is_isomorphic(tree1, tree2):
     :return: True if tree1 and tree2 are isomorphic. False otherwise.
     """
     # Task 4
-    return isomorphic(tree1.root(),tree2.root())
-
-def isomorphic(node1,node2):
-    if node1 is None and node2 is None:
-        return True
-    elif node1 is None or node2 is None:
-        return False
-    elif node1._element != node2._element:
-        return False
-    return (isomorphic(node1._left,node2._left) and isomorphic(node1._right,node2._right)) \
-            or (isomorphic(node1._left,node2._right) and isomorphic(node1._right,node2._left))
+    shapes = {}                                          # shared, so the two codes are comparable
+    return canonical_code(tree1, shapes) == canonical_code(tree2, shapes)
+
+def canonical_code(tree, shapes):
+    """Return an integer that is equal for two trees exactly when they are isomorphic (AHU encoding).
+
+    Two trees are isomorphic if they become equal by swapping the children of some nodes.
+    Bottom-up, each node is described by (element, smaller child code, larger child code),
+    and shapes numbers every distinct description (None and an empty tree are 0), so the
+    root's number identifies the tree up to isomorphism. Use the same shapes dict for all
+    trees to be compared. One postorder pass with an explicit stack: O(n) dict lookups.
+    """
+    if tree.root() is None:
+        return 0
+    codes = []                                           # codes of finished subtrees not yet used
+    stack = [(tree.root(), False)]                       # (node, children already finished?)
+    while stack:
+        node, done = stack.pop()
+        if not done:
+            stack.append((node, True))
+            if node._right is not None:
+                stack.append((node._right, False))
+            if node._left is not None:
+                stack.append((node._left, False))
+        else:
+            right = codes.pop() if node._right is not None else 0
+            left = codes.pop() if node._left is not None else 0
+            key = (node._element, min(left, right), max(left, right))   # child order does not matter
+            code = shapes.get(key)
+            if code is None:
+                code = shapes[key] = len(shapes) + 1     # a new shape
+            codes.append(code)
+    return codes.pop()
+
+def group_isomorphic(trees):
+    """Return a list of groups (lists) of the given trees, each group holding mutually isomorphic trees.
+
+    Every tree is encoded once with a shared shapes dict, then bucketed by its code.
+    """
+    shapes = {}
+    groups = {}
+    for tree in trees:
+        groups.setdefault(canonical_code(tree, shapes), []).append(tree)
+    return list(groups.values())
 
 def build_expression_tree(postfix):
     """
@@ -382,8 +661,8 @@ def build_expression_tree(postfix):
     char = postfix.split(" ")
     stack = []
     for i in char:
-        if i.isnumeric():
-            a = T.TreeNode(int(i))
+        if i.isnumeric() or (i.isidentifier() and not iskeyword(i)):
+            a = T.TreeNode(int(i) if i.isnumeric() else i)     # a number or a variable name
             T._size += 1
             stack.append(a)
         elif i in "+-*/":
@@ -568,6 +847,7 @@ def main():
     print("#-------------------------- Problem 4 is_isomorphic tests... --------------------------")
     print(is_isomorphic(tree3, tree4), "     Expected result is True")
     print(is_isomorphic(tree1, tree4), "     Expected result is False")
+    print(len(group_isomorphic([tree1, tree2, tree3, tree4])), "     Expected result is 3")
 
 
     print("#-------------------------- Problem 5 build_expression_tree tests... --------------------------")
@@ -602,6 +882,34 @@ def main():
     print("#-------------------------- Problem 6 evaluate tests... --------------------------")
     print(build_expression_tree("1 2 * 3 4 / +").evaluate(), "    Expected result is 2.75")
     print(build_expression_tree("5 7 6 + 3 - *").evaluate(), "    Expected result is 50")
+    print(build_expression_tree("x y * 3 4 / +").evaluate({"x": 1, "y": 2}), "    Expected result is 2.75")
+
+    print("#-------------------------- compile tests... --------------------------")
+    exp3 = build_expression_tree("a b c - - d /")
+    f = exp3.compile()
+    print(f(10, 5, 2, 2), f(a=10, b=5, c=2, d=2), "    Expected result is 3.5 3.5")
+    from time import perf_counter
+    start = perf_counter()
+    for i in range(100000):
+        exp3.evaluate({"a": i, "b": 5, "c": 2, "d": 2})
+    walk_time = perf_counter() - start
+    start = perf_counter()
+    for i in range(100000):
+        f(i, 5, 2, 2)
+    print("100000 evaluations:   evaluate() %.3f s   compiled %.3f s" % (walk_time, perf_counter() - start))
+
+    print("#-------------------------- evaluate_columns tests... --------------------------")
+    try:
+        import numpy as np
+    except ImportError:
+        print("NumPy is not installed, skipped")
+        return
+    rows = 10 ** 6
+    columns = {"a": np.arange(rows, dtype=float), "b": np.full(rows, 5.0), "c": np.full(rows, 2.0), "d": np.full(rows, 2.0)}
+    start = perf_counter()
+    values = exp3.evaluate_columns(columns)
+    print(values[:3], "    Expected result is [-1.5 -1.  -0.5]")
+    print("%d rows:   evaluate_columns %.3f s" % (rows, perf_counter() - start))
 
 if __name__ == '__main__':
     main()
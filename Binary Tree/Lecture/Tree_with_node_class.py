@@ -128,43 +128,71 @@ class Tree:
     def preorder(self):
         """Generate a preorder iteration of nodes in the tree."""
         if not self.is_empty():
-            for node in self._subtree_preorder(self._root):  # start recursion
+            for node in self._subtree_walk(self._root, 'preorder'):
                 yield node
 
     def _subtree_preorder(self, node):
         """Generate a preorder iteration of nodes in subtree rooted at node."""
-        yield node                                           # visit node before its subtrees
-        for c in self.children(node):                        # for each child c
-            for other in self._subtree_preorder(c):         # do preorder of c's subtree
-                yield other                                   # yielding each to our caller
+        return self._subtree_walk(node, 'preorder')
 
     def postorder(self):
         """Generate a postorder iteration of nodes in the tree."""
         if not self.is_empty():
-            for node in self._subtree_postorder(self._root):  # start recursion
+            for node in self._subtree_walk(self._root, 'postorder'):
                 yield node
 
     def _subtree_postorder(self, node):
         """Generate a postorder iteration of nodes in subtree rooted at node."""
-        for c in self.children(node):                        # for each child c
-            for other in self._subtree_postorder(c):        # do postorder of c's subtree
-                yield other                                   # yielding each to our caller
-        yield node                                           # visit node after its subtrees
+        return self._subtree_walk(node, 'postorder')
+
     def inorder(self):
         """Generate an inorder iteration of positions in the tree."""
         if not self.is_empty():
-          for node in self._subtree_inorder(self._root):
-            yield node
+            for node in self._subtree_walk(self._root, 'inorder'):
+                yield node
 
     def _subtree_inorder(self, node):
         """Generate an inorder iteration of positions in subtree rooted at p."""
-        if node._left is not None:          # if left child exists, traverse its subtree
-          for other in self._subtree_inorder(node._left):
-            yield other
-        yield node                               # visit p between its subtrees
-        if node._right is not None:         # if right child exists, traverse its subtree
-          for other in self._subtree_inorder(node._right):
-            yield other
+        return self._subtree_walk(node, 'inorder')
+
+    def _subtree_walk(self, node, order):
+        """Generate the nodes of the subtree rooted at node in 'preorder', 'inorder' or 'postorder'.
+
+        The pending nodes are kept on an explicit stack, so each node is yielded in O(1)
+        (not through one generator per level) and deep trees cannot hit the recursion limit.
+        """
+        if order == 'preorder':
+            stack = [node]
+            while stack:
+                node = stack.pop()
+                yield node                                   # visit node before its subtrees
+                if node._right is not None:                  # push right first, so left pops first
+                    stack.append(node._right)
+                if node._left is not None:
+                    stack.append(node._left)
+        elif order == 'inorder':
+            stack = []
+            while stack or node is not None:
+                while node is not None:                      # walk down the left spine
+                    stack.append(node)
+                    node = node._left
+                node = stack.pop()
+                yield node                                   # visit node between its subtrees
+                node = node._right
+        elif order == 'postorder':
+            stack = [(node, False)]                          # (node, subtrees already visited?)
+            while stack:
+                node, done = stack.pop()
+                if done:
+                    yield node                               # visit node after its subtrees
+                else:
+                    stack.append((node, True))
+                    if node._right is not None:
+                        stack.append((node._right, False))
+                    if node._left is not None:
+                        stack.append((node._left, False))
+        else:
+            raise ValueError('Unknown traversal order: ' + repr(order))
 
 
     def breadthfirst(self):
@@ -1,5 +1,8 @@
+from itertools import count
 from linked_queue import LinkedQueue
 
+_depth_versions = count()             # version stamps for cached depths, unique across all trees
+
 class Tree:
     class TreeNode:
         def __init__(self, element, parent = None, left = None, right = None):
@@ -8,11 +11,23 @@ class Tree:
             self._left = left
             self._right = right
 
+        # cache fields, only kept up to date if the tree caches heights (a new leaf has height 0)
+        _cached_height = 0
+        _cached_depth = 0
+        _depth_version = None
+
     #-------------------------- binary tree constructor --------------------------
-    def __init__(self):
-        """Create an initially empty binary tree."""
+    def __init__(self, cache_heights = False):
+        """Create an initially empty binary tree.
+
+        If cache_heights is True, every node keeps its height and (lazily) its depth:
+        the mutators refresh the heights along the changed path, so height() is O(1),
+        and a structural change just invalidates all cached depths at once.
+        """
         self._root = None
         self._size = 0
+        self._cache_heights = cache_heights
+        self._depth_version = next(_depth_versions)
 
     #-------------------------- public accessors ---------------------------------
     def __len__(self):
@@ -159,6 +174,7 @@ class Tree:
             raise ValueError('Left child exists')
         self._size += 1
         node._left = self.TreeNode(e, node)             # node is its parent
+        self._update_cache(node, False)                 # no existing node moved
         return node._left
 
     def add_right(self, node, e):
@@ -171,6 +187,7 @@ class Tree:
             raise ValueError('Right child exists')
         self._size += 1
         node._right = self.TreeNode(e, node)            # node is its parent
+        self._update_cache(node, False)                 # no existing node moved
         return node._right
 
     def _replace(self, node, e):
@@ -199,6 +216,7 @@ class Tree:
             else:
                 parent._right = child
         self._size -= 1
+        self._update_cache(node._parent)          # child's subtree moved up a level
         return node._element
 
 
@@ -215,6 +233,10 @@ class Tree:
         if not type(self) is type(t1) is type(t2):    # all 3 trees must be same type
             raise TypeError('Tree types must match')
         self._size += len(t1) + len(t2)
+        if self._cache_heights:
+            for t in (t1, t2):
+                if not t._cache_heights and not t.is_empty():
+                    self._recompute_heights(t._root)     # t did not keep its heights
         if not t1.is_empty():         # attached t1 as left subtree of node
             t1._root._parent = node
             node._left = t1._root
@@ -225,6 +247,7 @@ class Tree:
             node._right = t2._root
             t2._root = None             # set t2 instance to empty
             t2._size = 0
+        self._update_cache(node, False)   # attached nodes carry other trees' depth versions
 
     def preorderPrint(self,node):
         print("From preorderPrint:", node._element)
@@ -261,6 +284,8 @@ class Tree:
     def height(self, node = None):
         if node is None:
             node = self._root
+        if self._cache_heights:
+            return node._cached_height        # kept up to date by the mutators
         return self.inner(node)
 
     def inner(self, node):
@@ -272,11 +297,55 @@ class Tree:
             return max(l, r) + 1
 
     def depth(self, node):
+        if self._cache_heights:
+            return self._cached_depth(node)
         if self.is_root(node):
             return 0
         else:
             return 1 + self.depth(node._parent)
 
+    #-------------------------- height and depth cache --------------------------
+    def _cached_depth(self, node):
+        """Return the depth of node, reusing and refreshing the cached depths on its path."""
+        path = []
+        walk = node
+        while walk is not None and walk._depth_version != self._depth_version:
+            path.append(walk)                 # climb to the first node with a valid depth
+            walk = walk._parent
+        depth = walk._cached_depth if walk is not None else -1
+        for walk in reversed(path):
+            depth += 1
+            walk._cached_depth = depth
+            walk._depth_version = self._depth_version
+        return depth
+
+    def _update_cache(self, node, depths_changed = True):
+        """Refresh the cached heights from node up to the root (if the tree caches heights).
+
+        The climb stops at the first node whose height is unchanged. If depths_changed,
+        all cached depths are invalidated by moving to a new version stamp.
+        """
+        if not self._cache_heights:
+            return
+        if depths_changed:
+            self._depth_version = next(_depth_versions)
+        while node is not None:
+            height = self._fresh_height(node)
+            if height == node._cached_height:
+                break                         # nothing above changes either
+            node._cached_height = height
+            node = node._parent
+
+    def _recompute_heights(self, node):
+        """Recompute the cached height of every node in the subtree rooted at node."""
+        for walk in self._subtree_postorder(node):
+            walk._cached_height = self._fresh_height(walk)
+
+    def _fresh_height(self, node):
+        """Return the height of node computed from the cached heights of its children."""
+        return 1 + max(node._left._cached_height if node._left is not None else -1,
+                       node._right._cached_height if node._right is not None else -1)
+
     def return_max(self):
         maximum = self._root._element
         for each in self:  # This calls inorder traversal
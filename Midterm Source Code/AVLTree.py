@@ -0,0 +1,122 @@
+from ComplexTree import BinarySearchTree
+
+class AVLTree(BinarySearchTree):
+    """Binary Search Tree that keeps itself balanced with the AVL height-balance property."""
+
+    _track_sizes = True                   # subtree sizes keep split O(log n)
+
+    class TreeNode(BinarySearchTree.TreeNode):
+        """Node class that also caches the height of its subtree."""
+        def __init__(self, element, parent = None, left = None, right = None):
+            super().__init__(element, parent, left, right)
+            self._height = 0              # will be recomputed during balancing
+
+        def left_height(self):
+            return self._left._height if self._left is not None else 0
+
+        def right_height(self):
+            return self._right._height if self._right is not None else 0
+
+    #------------------------------- positional-based utility methods -------------------------------
+    def _recompute_height(self, node):
+        node._height = 1 + max(node.left_height(), node.right_height())
+
+    def _isbalanced(self, node):
+        return abs(node.left_height() - node.right_height()) <= 1
+
+    def _tall_child(self, node, favorleft=False):      # parameter controls tiebreaker
+        if node.left_height() + (1 if favorleft else 0) > node.right_height():
+            return node._left
+        else:
+            return node._right
+
+    def _tall_grandchild(self, node):
+        child = self._tall_child(node)
+        # if child is on left, favor left grandchild; else favor right grandchild
+        alignment = (child == node._left)
+        return self._tall_child(child, alignment)
+
+    def _rebalance(self, node):
+        while node is not None:
+            old_height = node._height                  # trivially 0 if new node
+            if not self._isbalanced(node):             # imbalance detected!
+                # perform trinode restructuring, setting node to resulting root,
+                # and recompute new local heights after the restructuring
+                node = self._restructure(self._tall_grandchild(node))
+                self._recompute_height(node._left)
+                self._recompute_height(node._right)
+            self._recompute_height(node)               # adjust for recent changes
+            if node._height == old_height:             # has height changed?
+                node = None                            # no further changes needed
+            else:
+                node = node._parent                    # repeat with parent
+
+    #---------------------------- override balancing hooks ----------------------------
+    def _rebalance_insert(self, node):
+        self._rebalance(node)
+
+    def _rebalance_delete(self, node):
+        self._rebalance(node)
+
+    def _bulk_finish(self, node, depth, max_depth):
+        self._recompute_height(node)               # children already have their heights
+
+    def _join_nodes(self, left, mid, right):
+        """Join by height: hang mid on the spine of the taller side, then rebalance upward."""
+        hl = left._height if left is not None else 0
+        hr = right._height if right is not None else 0
+        if abs(hl - hr) <= 1:                      # heights close enough: mid becomes the root
+            super()._join_nodes(left, mid, right)
+            self._recompute_height(mid)
+            return mid
+        taller_left = hl > hr
+        root = left if taller_left else right
+        lower = hr if taller_left else hl
+        parent = None
+        walk = root                                # walk down the inner spine of the taller tree
+        while walk is not None and walk._height > lower + 1:
+            parent = walk
+            walk = walk._right if taller_left else walk._left
+        if walk is not None:
+            walk._parent = None
+        if taller_left:
+            super()._join_nodes(walk, mid, right)
+        else:
+            super()._join_nodes(left, mid, walk)
+        self._recompute_height(mid)
+        self._relink(parent, mid, not taller_left)
+        self._update_sizes(parent)                 # the spine above mid gained its nodes
+        saved = self._root                         # rebalance inside the joined subtree
+        self._root = root
+        self._rebalance(parent)
+        root = self._root
+        self._root = saved
+        return root
+
+
+#----------------------------------- benchmark -------------------------------
+def benchmark_sorted_insert(tree_class, n):
+    """Insert 0 .. n-1 in sorted order into a new tree_class, and return (seconds, tree)."""
+    from time import perf_counter
+    tree = tree_class()
+    start = perf_counter()
+    for i in range(n):
+        tree.insert(i)
+    return perf_counter() - start, tree
+
+def main():
+    # The unbalanced tree turns sorted input into a chain, so every insert walks the
+    # whole chain: O(n^2) in total. 10^5 keys would take minutes, so it is measured on
+    # small inputs only, where the quadratic growth is already obvious.
+    print("#-------------------------- sorted insert, BinarySearchTree --------------------------")
+    for n in (1000, 2000, 4000, 8000):
+        seconds, tree = benchmark_sorted_insert(BinarySearchTree, n)
+        print("n = %8d   %8.3f s   %10.0f inserts/s   height %d" % (n, seconds, n / seconds, n))
+
+    print("#-------------------------- sorted insert, AVLTree --------------------------")
+    for n in (1000, 2000, 4000, 10 ** 5, 10 ** 6):
+        seconds, tree = benchmark_sorted_insert(AVLTree, n)
+        print("n = %8d   %8.3f s   %10.0f inserts/s   height %d" % (n, seconds, n / seconds, tree.root()._height))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+from ComplexTree import BinarySearchTree
+from AVLTree import AVLTree
+from RedBlackTree import RedBlackTree
+
+class Monoid:
+    """An associative combine function with an identity, plus how a single value is lifted into it."""
+    def __init__(self, identity, combine, lift = None):
+        self.identity = identity
+        self.combine = combine
+        self.lift = lift if lift is not None else (lambda v: v)
+
+COUNT = Monoid(0, lambda a, b: a + b, lambda v: 1)
+SUM = Monoid(0, lambda a, b: a + b)
+MIN = Monoid(float('inf'), min)             # numeric values only
+MAX = Monoid(float('-inf'), max)            # numeric values only
+
+
+class RangeAggregateMixin:
+    """Keep per-node subtree aggregates, so range_count/range_aggregate run in O(h).
+
+    Mix in ahead of a BinarySearchTree class, e.g. class T(RangeAggregateMixin, AVLTree).
+    Every node stores one aggregate per monoid for its whole subtree. The aggregates
+    are refreshed along the changed path by the tree mutators and locally by rotations.
+    A 'count' aggregate is always kept; 'sum' is kept unless other monoids are given.
+    """
+
+    def __init__(self, monoids = None, cache_heights = False):
+        super().__init__(cache_heights)
+        if monoids is None:
+            monoids = {'sum': SUM}
+        monoids = dict(monoids)
+        monoids['count'] = COUNT
+        self._monoid_names = list(monoids)
+        self._monoids = [monoids[name] for name in self._monoid_names]
+
+    #------------------------------- nonpublic utilities -------------------------------
+    def _agg(self, node, i):
+        """Return aggregate i of the subtree rooted at node (the identity for None)."""
+        return node._agg[i] if node is not None else self._monoids[i].identity
+
+    def _refresh(self, node):
+        """Recompute the aggregates of node from its element and its children's aggregates."""
+        node._agg = [m.combine(m.combine(self._agg(node._left, i), m.lift(node._element)), self._agg(node._right, i))
+                     for i, m in enumerate(self._monoids)]
+
+    def _refresh_path(self, node):
+        """Recompute the aggregates of node and of every ancestor of node."""
+        while node is not None:
+            self._refresh(node)
+            node = node._parent
+
+    #------------------------------- mutators keep the aggregates current -------------------------------
+    def add_root(self, e):
+        node = super().add_root(e)
+        self._refresh(node)
+        return node
+
+    def add_left(self, node, e):
+        child = super().add_left(node, e)
+        self._refresh_path(child)
+        return child
+
+    def add_right(self, node, e):
+        child = super().add_right(node, e)
+        self._refresh_path(child)
+        return child
+
+    def _replace(self, node, e):
+        old = super()._replace(node, e)
+        self._refresh_path(node)
+        return old
+
+    def _delete(self, node):
+        parent = node._parent
+        element = super()._delete(node)
+        self._refresh_path(parent)            # None when the root was deleted
+        return element
+
+    def _attach(self, node, t1, t2):
+        super()._attach(node, t1, t2)
+        self._refresh_path(node)
+
+    def _rotate(self, x):
+        y = x._parent
+        super()._rotate(x)
+        self._refresh(y)                      # y is now the child of x
+        self._refresh(x)
+
+    def _bulk_finish(self, node, depth, max_depth):
+        super()._bulk_finish(node, depth, max_depth)
+        self._refresh(node)                   # children are complete by now
+
+    def _join_nodes(self, left, mid, right):
+        root = super()._join_nodes(left, mid, right)
+        self._refresh_path(mid)               # rotations refreshed the nodes they moved
+        return root
+
+    def _subtree_size(self, node):
+        return self._agg(node, self._monoid_names.index('count'))
+
+    def _adopt(self, other):
+        super()._adopt(other)
+        same = other._monoid_names == self._monoid_names and other._monoids == self._monoids
+        if not same and not other.is_empty():
+            for node in self._subtree_walk(other._root, 'postorder'):
+                self._refresh(node)           # other kept aggregates for different monoids
+
+    def _empty_like(self):
+        return type(self)(dict(zip(self._monoid_names, self._monoids)), self._cache_heights)
+
+    #------------------------------- public range queries -------------------------------
+    def aggregate(self, name = 'sum'):
+        """Return the named aggregate over the whole tree."""
+        return self._agg(self._root, self._monoid_names.index(name))
+
+    def range_aggregate(self, a, b, name = 'sum'):
+        """Return the named aggregate over all values v with a <= v <= b.
+
+        Only two root-to-leaf paths are followed, so the cost is O(h) no matter
+        how many values lie in the range.
+        """
+        i = self._monoid_names.index(name)
+        m = self._monoids[i]
+        node = self._root
+        while node is not None and not a <= node._element <= b:   # find where the paths to a and b split
+            node = node._left if b < node._element else node._right
+        if node is None:
+            return m.identity
+        left = m.identity                     # values in node's left subtree that are >= a
+        walk = node._left
+        while walk is not None:
+            if walk._element < a:             # walk and its left subtree are out of range
+                walk = walk._right
+            else:                             # walk and its right subtree are in range
+                left = m.combine(m.combine(m.lift(walk._element), self._agg(walk._right, i)), left)
+                walk = walk._left
+        right = m.identity                    # values in node's right subtree that are <= b
+        walk = node._right
+        while walk is not None:
+            if walk._element > b:             # walk and its right subtree are out of range
+                walk = walk._left
+            else:                             # walk and its left subtree are in range
+                right = m.combine(right, m.combine(self._agg(walk._left, i), m.lift(walk._element)))
+                walk = walk._right
+        return m.combine(m.combine(left, m.lift(node._element)), right)
+
+    def range_count(self, a, b):
+        """Return the number of values v with a <= v <= b, in O(h)."""
+        return self.range_aggregate(a, b, 'count')
+
+
+class AggregateTree(RangeAggregateMixin, BinarySearchTree):
+    """Unbalanced Binary Search Tree with subtree aggregates."""
+
+class AggregateAVLTree(RangeAggregateMixin, AVLTree):
+    """AVL tree with subtree aggregates."""
+
+class AggregateRedBlackTree(RangeAggregateMixin, RedBlackTree):
+    """Red-black tree with subtree aggregates."""
+
+
+def main():
+    import random
+    tree = AggregateAVLTree({'sum': SUM, 'max': MAX})
+    values = random.sample(range(1000), 200)
+    for v in values:
+        tree.insert(v)
+    for v in values[:50]:
+        tree.delete_value(v)
+    rest = values[50:]
+    a, b = 250, 749
+    print(tree.range_count(a, b), "    Expected result is", sum(1 for v in rest if a <= v <= b))
+    print(tree.range_aggregate(a, b), "    Expected result is", sum(v for v in rest if a <= v <= b))
+    print(tree.range_aggregate(a, b, 'max'), "    Expected result is", max(v for v in rest if a <= v <= b))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,448 @@
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right, insort_right
+from collections import OrderedDict
+
+class BPlusTree:
+    """Disk-backed B+tree of fixed-size keys, with the BinarySearchTree interface.
+
+    The tree lives in fixed-size pages of a memory-mapped file. Internal pages hold
+    separator keys and child page numbers; leaf pages hold the keys themselves and are
+    linked in both directions, so in-order scans just follow the leaf chain. Decoded
+    pages are kept in an LRU page cache of cache_size pages; changed pages are written
+    back when they leave the cache and on flush()/close().
+
+    Keys are packed with the struct format key_format ('q' = signed 64-bit int,
+    'd' = float). Deleting never merges pages: a leaf may become underfull, and a leaf
+    that becomes empty is unlinked from the leaf chain and from its parent (its page
+    is not reused). So every leaf holds a key, and a lookup steps to at most one
+    following leaf.
+    """
+
+    _MAGIC = b'BPT1'
+    _HEADER = struct.Struct('<4sIIIIIQ1s')          # magic, page size, root, first leaf, last leaf, pages, size, key format
+    _PAGE_HEADER = struct.Struct('<BxHII')          # is leaf, count, next leaf, previous leaf
+    _NONE = 0                                       # page 0 is the file header, so 0 means "no page"
+    _MIN_CACHE = 64                                 # enough to keep every page of one operation cached
+
+    #-------------------------- nested _Page class --------------------------
+    class _Page:
+        """Decoded page: keys, plus child page numbers (internal) or leaf links (leaf)."""
+        __slots__ = '_number', '_leaf', '_keys', '_children', '_next', '_prev', '_dirty'
+
+        def __init__(self, number, leaf, keys = None, children = None, next = 0, prev = 0):
+            self._number = number
+            self._leaf = leaf
+            self._keys = keys if keys is not None else []
+            self._children = children if children is not None else []
+            self._next = next
+            self._prev = prev
+            self._dirty = True
+
+    #-------------------------- constructor --------------------------
+    def __init__(self, path, page_size = 4096, cache_size = 1024, key_format = 'q'):
+        """Open the B+tree stored at path, creating an empty one if the file does not exist.
+
+        page_size and key_format are only used for a new file; an existing file keeps its own.
+        cache_size must be at least _MIN_CACHE (64) pages (raise ValueError otherwise).
+        """
+        if cache_size < self._MIN_CACHE:
+            raise ValueError('cache_size must be at least %d pages' % self._MIN_CACHE)
+        self._cache = OrderedDict()                 # page number -> _Page, least recently used first
+        self._cache_size = cache_size
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'w+b' if new else 'r+b')
+        if new:
+            self._page_size = page_size
+            self._key = struct.Struct('<' + key_format)
+            self._root = self._first = self._last = self._NONE
+            self._pages = 1                         # just the header page
+            self._size = 0
+            self._file.truncate(16 * page_size)
+        else:
+            header = self._HEADER.unpack(self._file.read(self._HEADER.size))
+            if header[0] != self._MAGIC:
+                raise ValueError('Not a B+tree file: ' + repr(path))
+            self._page_size, self._root, self._first, self._last, self._pages, self._size = header[1:7]
+            self._key = struct.Struct('<' + header[7].decode())
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self._leaf_capacity = (self._page_size - self._PAGE_HEADER.size) // self._key.size
+        self._internal_capacity = (self._page_size - self._PAGE_HEADER.size - 4) // (self._key.size + 4)
+        if self._leaf_capacity < 3 or self._internal_capacity < 3:
+            raise ValueError('Page size too small')
+        if new:
+            self._write_header()
+
+    #-------------------------- page storage --------------------------
+    def _write_header(self):
+        self._mm[0:self._HEADER.size] = self._HEADER.pack(self._MAGIC, self._page_size, self._root, self._first,
+                                                          self._last, self._pages, self._size,
+                                                          self._key.format[-1:].encode())
+
+    def _read_page(self, number):
+        """Decode page number from the file."""
+        offset = number * self._page_size
+        leaf, count, next, prev = self._PAGE_HEADER.unpack_from(self._mm, offset)
+        offset += self._PAGE_HEADER.size
+        keys = list(struct.unpack_from('<%d%s' % (count, self._key.format[-1]), self._mm, offset))
+        children = None
+        if not leaf:
+            offset += self._internal_capacity * self._key.size
+            children = list(struct.unpack_from('<%dI' % (count + 1), self._mm, offset))
+        page = self._Page(number, bool(leaf), keys, children, next, prev)
+        page._dirty = False
+        return page
+
+    def _write_page(self, page):
+        """Encode page into the file."""
+        offset = page._number * self._page_size
+        self._PAGE_HEADER.pack_into(self._mm, offset, page._leaf, len(page._keys), page._next, page._prev)
+        offset += self._PAGE_HEADER.size
+        struct.pack_into('<%d%s' % (len(page._keys), self._key.format[-1]), self._mm, offset, *page._keys)
+        if not page._leaf:
+            offset += self._internal_capacity * self._key.size
+            struct.pack_into('<%dI' % len(page._children), self._mm, offset, *page._children)
+        page._dirty = False
+
+    def _cache_page(self, page):
+        """Put page in the cache as most recently used, evicting (and writing back) the oldest pages."""
+        self._cache[page._number] = page
+        self._cache.move_to_end(page._number)
+        while len(self._cache) > self._cache_size:
+            number, old = next(iter(self._cache.items()))
+            if old._dirty:
+                self._write_page(old)               # write first, so a failed write loses nothing
+            del self._cache[number]
+
+    def _page(self, number):
+        """Return the decoded page number, from the cache if possible."""
+        page = self._cache.get(number)
+        if page is None:
+            page = self._read_page(number)
+        self._cache_page(page)
+        return page
+
+    def _touch(self, page):
+        """Mark page as changed (and make sure it is cached, so it gets written back)."""
+        page._dirty = True
+        self._cache_page(page)
+
+    def _new_page(self, leaf):
+        """Allocate a fresh page at the end of the file, growing the file when needed."""
+        number = self._pages
+        self._pages += 1
+        if self._pages * self._page_size > len(self._mm):
+            self._mm.flush()
+            self._mm.close()
+            self._file.truncate(2 * self._pages * self._page_size)     # grow geometrically
+            self._mm = mmap.mmap(self._file.fileno(), 0)
+        page = self._Page(number, leaf)
+        self._cache_page(page)
+        return page
+
+    def flush(self):
+        """Write every changed page and the header to the file."""
+        for page in self._cache.values():
+            if page._dirty:
+                self._write_page(page)
+        self._write_header()
+        self._mm.flush()
+
+    def close(self):
+        """Flush and close the file."""
+        self.flush()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    #-------------------------- public accessors --------------------------
+    def __len__(self):
+        """Return the total number of keys in the tree."""
+        return self._size
+
+    def is_empty(self):
+        """Return True if the tree is empty."""
+        return self._size == 0
+
+    def _find_leaf(self, v):
+        """Return the path of pages from the root to the leftmost leaf that may hold v."""
+        path = [self._page(self._root)]
+        while not path[-1]._leaf:
+            page = path[-1]
+            path.append(self._page(page._children[bisect_left(page._keys, v)]))
+        return path
+
+    def get_node(self, v):
+        """Return the stored key equal to v (raise KeyError if not found)."""
+        if not self.is_empty():
+            leaf = self._find_leaf(v)[-1]
+            while True:
+                i = bisect_left(leaf._keys, v)
+                if i < len(leaf._keys):
+                    if leaf._keys[i] == v:
+                        return leaf._keys[i]
+                    break
+                if leaf._next == self._NONE:        # v is larger than every key of this leaf
+                    break
+                leaf = self._page(leaf._next)
+        raise KeyError('Not found: ' + repr(v))
+
+    def __contains__(self, v):
+        try:
+            self.get_node(v)
+            return True
+        except KeyError:
+            return False
+
+    def first(self):
+        """Return the smallest key (or None if empty)."""
+        for v in self:
+            return v
+        return None
+
+    def last(self):
+        """Return the largest key (or None if empty)."""
+        for v in reversed(self):
+            return v
+        return None
+
+    def __iter__(self):
+        """Generate an iteration of all keys in order, following the leaf chain."""
+        number = self._first
+        while number != self._NONE:
+            page = self._page(number)
+            for v in list(page._keys):
+                yield v
+            number = page._next
+
+    def __reversed__(self):
+        """Generate an iteration of all keys in reverse order."""
+        number = self._last
+        while number != self._NONE:
+            page = self._page(number)
+            for v in reversed(list(page._keys)):
+                yield v
+            number = page._prev
+
+    #-------------------------- mutators --------------------------
+    def insert(self, v):
+        """Insert key v into the tree (raise struct.error if v does not fit key_format)."""
+        self._key.pack(v)                           # reject a bad key now, not when its page is written
+        if self.is_empty() and self._root == self._NONE:
+            leaf = self._new_page(True)
+            self._root = self._first = self._last = leaf._number
+        path = [self._page(self._root)]
+        while not path[-1]._leaf:                   # descend to the rightmost place for v
+            page = path[-1]
+            path.append(self._page(page._children[bisect_right(page._keys, v)]))
+        leaf = path.pop()
+        insort_right(leaf._keys, v)
+        self._touch(leaf)
+        self._size += 1
+        if len(leaf._keys) > self._leaf_capacity:
+            self._split(leaf, path)
+
+    def _split(self, page, path):
+        """Split the overfull page in two, pushing the separator into its parent (recursively)."""
+        sibling = self._new_page(page._leaf)
+        mid = len(page._keys) // 2
+        if page._leaf:
+            sibling._keys = page._keys[mid:]        # separator stays in the right leaf
+            page._keys = page._keys[:mid]
+            separator = sibling._keys[0]
+            sibling._next, sibling._prev = page._next, page._number
+            if page._next != self._NONE:
+                following = self._page(page._next)
+                following._prev = sibling._number
+                self._touch(following)
+            else:
+                self._last = sibling._number
+            page._next = sibling._number
+        else:
+            separator = page._keys[mid]             # separator moves up
+            sibling._keys = page._keys[mid + 1:]
+            sibling._children = page._children[mid + 1:]
+            page._keys = page._keys[:mid]
+            page._children = page._children[:mid + 1]
+        self._touch(page)
+        self._touch(sibling)
+        if not path:                                # page was the root: grow a new root
+            root = self._new_page(False)
+            root._keys = [separator]
+            root._children = [page._number, sibling._number]
+            self._root = root._number
+            return
+        parent = path.pop()
+        i = parent._children.index(page._number)
+        parent._keys.insert(i, separator)
+        parent._children.insert(i + 1, sibling._number)
+        self._touch(parent)
+        if len(parent._keys) > self._internal_capacity:
+            self._split(parent, path)
+
+    def delete_value(self, v):
+        """Remove one copy of key v from the tree (raise KeyError if not found).
+
+        The leaf is not merged with its neighbours; if it becomes empty it is unlinked.
+        """
+        if not self.is_empty():
+            path = self._find_leaf(v)
+            while True:
+                leaf = path[-1]
+                i = bisect_left(leaf._keys, v)
+                if i < len(leaf._keys):
+                    if leaf._keys[i] == v:
+                        del leaf._keys[i]
+                        self._touch(leaf)
+                        self._size -= 1
+                        if not leaf._keys:
+                            self._remove_leaf(path)
+                        return
+                    break
+                if leaf._next == self._NONE:
+                    break
+                self._step_right(path)
+        raise KeyError('Not found: ' + repr(v))
+
+    def _step_right(self, path):
+        """Change path (pages from the root to a leaf that is not the last) into the path to the next leaf."""
+        child = path.pop()
+        while True:
+            parent = path[-1]
+            i = parent._children.index(child._number)
+            if i + 1 < len(parent._children):
+                break
+            child = path.pop()                      # child was its parent's last: go up
+        path.append(self._page(parent._children[i + 1]))
+        while not path[-1]._leaf:                   # then down the leftmost branch
+            path.append(self._page(path[-1]._children[0]))
+
+    def _remove_leaf(self, path):
+        """Unlink the empty leaf at the end of path from the leaf chain and from its parent.
+
+        A parent left without children is removed from its own parent in turn; if the
+        root goes, the tree is empty again.
+        """
+        leaf = path.pop()
+        if leaf._prev != self._NONE:
+            previous = self._page(leaf._prev)
+            previous._next = leaf._next
+            self._touch(previous)
+        else:
+            self._first = leaf._next
+        if leaf._next != self._NONE:
+            following = self._page(leaf._next)
+            following._prev = leaf._prev
+            self._touch(following)
+        else:
+            self._last = leaf._prev
+        page = leaf
+        while path:
+            parent = path.pop()
+            i = parent._children.index(page._number)
+            del parent._children[i]
+            if parent._keys:
+                del parent._keys[max(i - 1, 0)]     # the neighbouring child takes over page's key range
+            self._touch(parent)
+            if parent._children:
+                return
+            page = parent
+        self._root = self._NONE                     # every page is gone
+
+    def bulk_load(self, iterable, fill = 1.0):
+        """Fill an empty tree with the keys of iterable, writing the pages level by level.
+
+        The keys are sorted first only if they are not already in order. Leaves and
+        internal pages are filled to the given fraction of their capacity, and every
+        page is written exactly once: O(n) page writes in total.
+        Raise ValueError if the tree is not empty, and struct.error if a key does not
+        fit key_format (before anything is written).
+        """
+        if not self.is_empty():
+            raise ValueError('Tree is not empty')
+        keys = list(iterable)
+        for v in keys:
+            self._key.pack(v)
+        for i in range(1, len(keys)):
+            if keys[i] < keys[i - 1]:               # out of order, so sort once
+                keys.sort()
+                break
+        if not keys:
+            return
+        per_leaf = max(2, int(self._leaf_capacity * fill))
+        level, separators = [], []                  # pages of the current level, and their first keys
+        previous = None
+        for start in range(0, len(keys), per_leaf):
+            leaf = self._new_page(True)
+            leaf._keys = keys[start:start + per_leaf]
+            if previous is not None:
+                previous._next, leaf._prev = leaf._number, previous._number
+                self._write_page(previous)
+            level.append(leaf._number)
+            separators.append(leaf._keys[0])
+            previous = leaf
+        self._write_page(previous)
+        self._first, self._last = level[0], level[-1]
+        per_internal = max(2, int(self._internal_capacity * fill))
+        while len(level) > 1:                       # build the next level up
+            groups = -(-len(level) // (per_internal + 1))
+            base, extra = divmod(len(level), groups)  # spread children evenly, so no page gets just one
+            parents, parent_separators = [], []
+            start = 0
+            for g in range(groups):
+                end = start + base + (1 if g < extra else 0)
+                page = self._new_page(False)
+                page._children = level[start:end]
+                page._keys = separators[start + 1:end]
+                self._write_page(page)
+                parents.append(page._number)
+                parent_separators.append(separators[start])
+                start = end
+            level, separators = parents, parent_separators
+        self._root = level[0]
+        self._size = len(keys)
+        self._write_header()
+
+
+#----------------------------------- benchmark -------------------------------
+def main():
+    import random
+    import tempfile
+    from time import perf_counter
+    from AVLTree import AVLTree
+    n = 10 ** 6
+    keys = list(range(n))
+    path = os.path.join(tempfile.mkdtemp(), 'keys.bpt')
+    with BPlusTree(path, cache_size=256) as tree:
+        start = perf_counter()
+        tree.bulk_load(keys)
+        print("bulk_load %d keys     %7.3f s" % (n, perf_counter() - start))
+        start = perf_counter()
+        total = sum(1 for _ in tree)
+        print("scan %d keys          %7.3f s" % (total, perf_counter() - start))
+        probes = random.sample(keys, 10 ** 5)
+        start = perf_counter()
+        for v in probes:
+            tree.get_node(v)
+        print("%d lookups         %7.3f s" % (len(probes), perf_counter() - start))
+        start = perf_counter()
+        for v in probes:
+            tree.delete_value(v)
+        for v in probes:
+            tree.insert(v)
+        print("%d deletes+inserts %7.3f s" % (len(probes), perf_counter() - start))
+    print("file size %.1f MB" % (os.path.getsize(path) / 2 ** 20))
+    with BPlusTree(path) as tree:                   # reopen: everything was written back
+        print(len(tree), tree.first(), tree.last(), "    Expected result is", n, 0, n - 1)
+    start = perf_counter()
+    AVLTree.from_iterable(keys)
+    print("AVLTree.from_iterable %d keys  %7.3f s (in memory, for comparison)" % (n, perf_counter() - start))
+
+if __name__ == '__main__':
+    main()
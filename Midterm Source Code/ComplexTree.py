@@ -1,3 +1,7 @@
+from itertools import count
+
+_depth_versions = count()             # version stamps for cached depths, unique across all trees
+
 class Empty(Exception):
     def __init__(self, msg):
         self.msg = msg
@@ -10,11 +14,26 @@ class Tree:
             self._left = left
             self._right = right
 
+        # cache fields, only kept up to date if the tree caches heights (a new leaf has height 0)
+        _cached_height = 0
+        _cached_depth = 0
+        _depth_version = None
+        _count = 1                      # subtree size, only kept if the tree tracks sizes
+
+    _track_sizes = False                # balanced subclasses keep a subtree size in every node
+
     #-------------------------- binary tree constructor --------------------------
-    def __init__(self):
-        """Create an initially empty binary tree."""
+    def __init__(self, cache_heights = False):
+        """Create an initially empty binary tree.
+
+        If cache_heights is True, every node keeps its height and (lazily) its depth:
+        the mutators refresh the heights along the changed path, so height() is O(1),
+        and a structural change just invalidates all cached depths at once.
+        """
         self._root = None
         self._size = 0
+        self._cache_heights = cache_heights
+        self._depth_version = next(_depth_versions)
 
     #-------------------------- public accessors ---------------------------------
     def __len__(self):
@@ -40,6 +59,8 @@ class Tree:
 
     def depth(self, node):
         """Return the number of levels separating a given node from the root."""
+        if self._cache_heights:
+            return self._cached_depth(node)
         if self.is_root(node):
             return 0
         else:
@@ -63,8 +84,70 @@ class Tree:
         """
         if node is None:
             node = self._root
+        if self._cache_heights:
+            return node._cached_height        # kept up to date by the mutators
         return self._height2(node)        # start _height2 recursion
 
+    #-------------------------- height and depth cache --------------------------
+    def _cached_depth(self, node):
+        """Return the depth of node, reusing and refreshing the cached depths on its path."""
+        path = []
+        walk = node
+        while walk is not None and walk._depth_version != self._depth_version:
+            path.append(walk)                 # climb to the first node with a valid depth
+            walk = walk._parent
+        depth = walk._cached_depth if walk is not None else -1
+        for walk in reversed(path):
+            depth += 1
+            walk._cached_depth = depth
+            walk._depth_version = self._depth_version
+        return depth
+
+    def _update_cache(self, node, depths_changed = True):
+        """Refresh the cached heights from node up to the root (if the tree caches heights).
+
+        The climb stops at the first node whose height is unchanged. If depths_changed,
+        all cached depths are invalidated by moving to a new version stamp.
+        """
+        if not self._cache_heights:
+            return
+        if depths_changed:
+            self._depth_version = next(_depth_versions)
+        while node is not None:
+            height = self._fresh_height(node)
+            if height == node._cached_height:
+                break                         # nothing above changes either
+            node._cached_height = height
+            node = node._parent
+
+    def _recompute_heights(self, node):
+        """Recompute the cached height of every node in the subtree rooted at node."""
+        for walk in self._subtree_walk(node, 'postorder'):
+            walk._cached_height = self._fresh_height(walk)
+
+    def _adopt(self, other):
+        """Make the per-node bookkeeping of tree other fit this tree, before other's nodes move here."""
+        if self._cache_heights and not other._cache_heights and not other.is_empty():
+            self._recompute_heights(other._root)         # other did not keep its heights
+
+    def _update_sizes(self, node):
+        """Recompute the subtree sizes from node up to the root (if the tree tracks sizes)."""
+        if not self._track_sizes:
+            return
+        while node is not None:
+            node._count = self._fresh_count(node)
+            node = node._parent
+
+    def _fresh_count(self, node):
+        """Return the size of the subtree at node computed from its children's sizes."""
+        return 1 + (node._left._count if node._left is not None else 0) \
+                 + (node._right._count if node._right is not None else 0)
+
+    def _fresh_height(self, node):
+        """Return the height of node computed from the cached heights of its children."""
+        return 1 + max(node._left._cached_height if node._left is not None else -1,
+                       node._right._cached_height if node._right is not None else -1)
+
     def nodes(self):
         """Generate an iteration of the tree's nodes."""
         return self.preorder()                            # return entire preorder iteration
@@ -72,43 +155,71 @@ class Tree:
     def preorder(self):
         """Generate a preorder iteration of nodes in the tree."""
         if not self.is_empty():
-            for node in self._subtree_preorder(self._root):  # start recursion
+            for node in self._subtree_walk(self._root, 'preorder'):
                 yield node
 
     def _subtree_preorder(self, node):
         """Generate a preorder iteration of nodes in subtree rooted at node."""
-        yield node                                           # visit node before its subtrees
-        for c in self.children(node):                        # for each child c
-            for other in self._subtree_preorder(c):         # do preorder of c's subtree
-                yield other                                   # yielding each to our caller
+        return self._subtree_walk(node, 'preorder')
 
     def postorder(self):
         """Generate a postorder iteration of nodes in the tree."""
         if not self.is_empty():
-            for node in self._subtree_postorder(self._root):  # start recursion
+            for node in self._subtree_walk(self._root, 'postorder'):
                 yield node
 
     def _subtree_postorder(self, node):
         """Generate a postorder iteration of nodes in subtree rooted at node."""
-        for c in self.children(node):                        # for each child c
-            for other in self._subtree_postorder(c):        # do postorder of c's subtree
-                yield other                                   # yielding each to our caller
-        yield node                                           # visit node after its subtrees
+        return self._subtree_walk(node, 'postorder')
+
     def inorder(self):
         """Generate an inorder iteration of positions in the tree."""
         if not self.is_empty():
-          for node in self._subtree_inorder(self._root):
-            yield node
+            for node in self._subtree_walk(self._root, 'inorder'):
+                yield node
 
     def _subtree_inorder(self, node):
         """Generate an inorder iteration of positions in subtree rooted at p."""
-        if node._left is not None:          # if left child exists, traverse its subtree
-          for other in self._subtree_inorder(node._left):
-            yield other
-        yield node                               # visit p between its subtrees
-        if node._right is not None:         # if right child exists, traverse its subtree
-          for other in self._subtree_inorder(node._right):
-            yield other
+        return self._subtree_walk(node, 'inorder')
+
+    def _subtree_walk(self, node, order):
+        """Generate the nodes of the subtree rooted at node in 'preorder', 'inorder' or 'postorder'.
+
+        The pending nodes are kept on an explicit stack, so each node is yielded in O(1)
+        (not through one generator per level) and deep trees cannot hit the recursion limit.
+        """
+        if order == 'preorder':
+            stack = [node]
+            while stack:
+                node = stack.pop()
+                yield node                                   # visit node before its subtrees
+                if node._right is not None:                  # push right first, so left pops first
+                    stack.append(node._right)
+                if node._left is not None:
+                    stack.append(node._left)
+        elif order == 'inorder':
+            stack = []
+            while stack or node is not None:
+                while node is not None:                      # walk down the left spine
+                    stack.append(node)
+                    node = node._left
+                node = stack.pop()
+                yield node                                   # visit node between its subtrees
+                node = node._right
+        elif order == 'postorder':
+            stack = [(node, False)]                          # (node, subtrees already visited?)
+            while stack:
+                node, done = stack.pop()
+                if done:
+                    yield node                               # visit node after its subtrees
+                else:
+                    stack.append((node, True))
+                    if node._right is not None:
+                        stack.append((node._right, False))
+                    if node._left is not None:
+                        stack.append((node._left, False))
+        else:
+            raise ValueError('Unknown traversal order: ' + repr(order))
 
 
     def breadthfirst(self):
@@ -188,6 +299,8 @@ class Tree:
             raise ValueError('Left child exists')
         self._size += 1
         node._left = self.TreeNode(e, node)             # node is its parent
+        self._update_cache(node, False)                 # no existing node moved
+        self._update_sizes(node)
         return node._left
 
     def add_right(self, node, e):
@@ -200,6 +313,8 @@ class Tree:
             raise ValueError('Right child exists')
         self._size += 1
         node._right = self.TreeNode(e, node)            # node is its parent
+        self._update_cache(node, False)                 # no existing node moved
+        self._update_sizes(node)
         return node._right
 
     def _replace(self, node, e):
@@ -228,6 +343,8 @@ class Tree:
             else:
                 parent._right = child
         self._size -= 1
+        self._update_cache(node._parent)          # child's subtree moved up a level
+        self._update_sizes(node._parent)
         return node._element
 
 
@@ -244,6 +361,8 @@ class Tree:
         if not type(self) is type(t1) is type(t2):    # all 3 trees must be same type
             raise TypeError('Tree types must match')
         self._size += len(t1) + len(t2)
+        self._adopt(t1)
+        self._adopt(t2)
         if not t1.is_empty():         # attached t1 as left subtree of node
             t1._root._parent = node
             node._left = t1._root
@@ -254,7 +373,135 @@ class Tree:
             node._right = t2._root
             t2._root = None             # set t2 instance to empty
             t2._size = 0
+        self._update_cache(node, False)   # attached nodes carry other trees' depth versions
+        self._update_sizes(node)
+
 
+    #-------------------------- lowest common ancestors --------------------------
+    def lca_index(self):
+        """Return an LCAIndex answering lowest-common-ancestor queries on the tree as it is now."""
+        return LCAIndex(self)
+
+    def lca_many(self, pairs):
+        """Return a list with the lowest common ancestor of each (node1, node2) pair (offline, Tarjan).
+
+        All pairs are answered during one postorder walk. When a node finishes, it is
+        merged with its children's sets in a union-find forest (union by rank, path
+        compression), so every set is one finished subtree whose parent is not finished
+        yet; that parent is the answer for a pair that reaches into the set from a node
+        finishing later. The forest is kept in lists indexed by postorder number.
+        The whole batch costs O(n + q * alpha(n)), and no index is kept afterwards.
+        Every node in pairs must belong to this tree.
+        """
+        pairs = list(pairs)
+        result = [None] * len(pairs)
+        if self.is_empty():
+            return result
+        order = list(self._subtree_walk(self._root, 'postorder'))
+        number = {node: k for k, node in enumerate(order)}    # nodes are handled by postorder number
+        queries = {}                                     # number -> [(earlier number, pair number)]
+        for i, (node1, node2) in enumerate(pairs):
+            k1, k2 = number[node1], number[node2]
+            if k1 > k2:
+                k1, k2 = k2, k1
+            if k1 == k2:
+                result[i] = node1
+            else:                                        # answered when the later node finishes
+                queries.setdefault(k2, []).append((k1, i))
+        link = list(range(len(order)))                   # union-find parent (a set's root links to itself)
+        rank = [0] * len(order)
+        ancestor = [None] * len(order)                   # set root -> parent of the set's topmost node
+        finished = []                                    # set roots of finished subtrees whose parent is not finished
+        for k, node in enumerate(order):
+            if k in queries:
+                for other, i in queries[k]:              # other is finished: find its set's root
+                    root = link[other]
+                    while link[root] != root:
+                        root = link[root]
+                    while link[other] != root:           # path compression
+                        link[other], other = root, link[other]
+                    result[i] = ancestor[root]
+            root = k                                     # node's children finished just before node
+            for child in (node._left, node._right):
+                if child is not None:
+                    other = finished.pop()
+                    if rank[other] > rank[root]:         # union by rank
+                        root, other = other, root
+                    elif rank[other] == rank[root]:
+                        rank[root] += 1
+                    link[other] = root
+            ancestor[root] = node._parent
+            finished.append(root)
+        return result
+
+
+class LCAIndex:
+    """Lowest-common-ancestor index for a static Tree: O(n log n) to build, O(1) per query.
+
+    The nodes are listed in Euler-tour order (a node is listed again each time the walk
+    returns to it from a child); the LCA of two nodes is the shallowest node listed
+    between their first appearances, found with a sparse table of range minimums.
+    The index describes the tree when it was built: rebuild it after the tree changes.
+    """
+    def __init__(self, tree):
+        self._euler = []                   # nodes in Euler-tour order
+        self._depths = []                  # depth of each entry of _euler
+        self._first = {}                   # node -> position of its first appearance
+        if not tree.is_empty():
+            self._tour(tree.root())
+        self._build_table()
+
+    def _tour(self, root):
+        euler, depths, first = self._euler, self._depths, self._first
+        stack = [(root, 0, 0)]             # (node, depth, children visited so far)
+        while stack:
+            node, depth, stage = stack.pop()
+            if stage == 0:
+                first[node] = len(euler)
+            euler.append(node)
+            depths.append(depth)
+            if stage == 0 and node._left is not None:
+                stack.append((node, depth, 1))
+                stack.append((node._left, depth + 1, 0))
+            elif stage < 2 and node._right is not None:
+                stack.append((node, depth, 2))
+                stack.append((node._right, depth + 1, 0))
+
+    def _build_table(self):
+        """_table[j][i] is the position of the shallowest entry among positions i .. i + 2**j - 1."""
+        depths = self._depths
+        row = list(range(len(depths)))
+        self._table = [row]
+        span = 1
+        while 2 * span <= len(depths):
+            row = [a if depths[a] <= depths[b] else b
+                   for a, b in zip(row, row[span:])]    # combine two halves of length span
+            self._table.append(row)
+            span *= 2
+
+    def query(self, node1, node2):
+        """Return the lowest common ancestor of node1 and node2 (raise KeyError for an unknown node)."""
+        i, j = self._first[node1], self._first[node2]
+        if i > j:
+            i, j = j, i
+        level = (j - i + 1).bit_length() - 1             # two blocks of 2**level cover i .. j
+        row = self._table[level]
+        a, b = row[i], row[j + 1 - (1 << level)]
+        return self._euler[a] if self._depths[a] <= self._depths[b] else self._euler[b]
+
+    def query_many(self, pairs):
+        """Return a list with the lowest common ancestor of each (node1, node2) pair."""
+        first, table, depths, euler = self._first, self._table, self._depths, self._euler
+        result = []
+        for node1, node2 in pairs:
+            i, j = first[node1], first[node2]
+            if i > j:
+                i, j = j, i
+            level = (j - i + 1).bit_length() - 1
+            row = table[level]
+            a, b = row[i], row[j + 1 - (1 << level)]
+            result.append(euler[a] if depths[a] <= depths[b] else euler[b])
+        return result
 
 
 
@@ -264,15 +511,17 @@ class BinarySearchTree(Tree):
     #------------------------------- nonpublic utilities -------------------------------
     def _subtree_search(self, node, v):
         """Return the node having value v, or last node searched."""
-        if v == node._element:                                   # found match
-            return node                                         
-        elif v < node._element:                                  # search left subtree
-            if node._left is not None:
-                return self._subtree_search(node._left, v)   
-        else:                                              # search right subtree
-            if node._right is not None:
-                return self._subtree_search(node._right, v)
-        return node                                           # unsucessful search
+        while True:                                   # loop, so a deep tree cannot hit the recursion limit
+            if v == node._element:                               # found match
+                return node
+            elif v < node._element:                              # search left subtree
+                if node._left is None:
+                    return node                                  # unsucessful search
+                node = node._left
+            else:                                              # search right subtree
+                if node._right is None:
+                    return node                                  # unsucessful search
+                node = node._right
 
     def _subtree_first_position(self, node):
         """Return the node that contains the first item in subtree rooted at given node."""
@@ -287,7 +536,92 @@ class BinarySearchTree(Tree):
         while walk._right is not None:                # keep walking right
             walk = walk._right
         return walk
-    
+
+    def _relink(self, parent, child, make_left_child):
+        """Relink parent node with child node (we allow child to be None)."""
+        if make_left_child:                           # make it a left child
+            parent._left = child
+        else:                                         # make it a right child
+            parent._right = child
+        if child is not None:                         # make child point to parent
+            child._parent = parent
+        if self._cache_heights:
+            self._update_cache(parent)
+        if self._track_sizes:
+            parent._count = self._fresh_count(parent)     # callers relink bottom-up
+
+    def _rotate(self, x):
+        """Rotate node x above its parent.
+
+        Switches between these configurations, depending on whether x==a or x==b.
+
+              b                  a
+             / \                /  \
+            a  t2             t0   b
+           / \                     / \
+          t0  t1                  t1  t2
+
+        Caller should ensure that x is not the root.
+        """
+        y = x._parent                                 # we assume this exists
+        z = y._parent                                 # grandparent (possibly None)
+        y_was_left = z is not None and y == z._left
+        # rotate x and y, including transfer of middle subtree
+        if x == y._left:
+            self._relink(y, x._right, True)           # x._right becomes left child of y
+            self._relink(x, y, False)                 # y becomes right child of x
+        else:
+            self._relink(y, x._left, False)           # x._left becomes right child of y
+            self._relink(x, y, True)                  # y becomes left child of x
+        # then hang x where y was (last, so z sees x's final subtree)
+        if z is None:
+            self._root = x                            # x becomes root
+            x._parent = None
+        else:
+            self._relink(z, x, y_was_left)            # x becomes a direct child of z
+
+    def _restructure(self, x):
+        """Perform a trinode restructure among node x, its parent, and its grandparent.
+
+        Return the node that becomes root of the restructured subtree.
+        Caller should ensure that x has a grandparent.
+        """
+        y = x._parent
+        z = y._parent
+        if (x == y._right) == (y == z._right):        # matching alignments
+            self._rotate(y)                           # single rotation (of y)
+            return y                                  # y is new subtree root
+        else:                                         # opposite alignments
+            self._rotate(x)                           # double rotation (of x)
+            self._rotate(x)
+            return x                                  # x is new subtree root
+
+    def _join_nodes(self, left, mid, right):
+        """Link detached subtrees left and right below the detached node mid, and return the new root.
+
+        Every value in left is <= mid's value <= every value in right. The plain tree
+        just links them (O(1)); balanced subclasses override this to keep their shape.
+        """
+        mid._parent = None
+        self._relink(mid, left, True)
+        self._relink(mid, right, False)
+        return mid
+
+    def _subtree_size(self, node):
+        """Return the number of nodes in the subtree rooted at node (0 for None).
+
+        Trees that track sizes answer in O(1); otherwise the nodes are counted.
+        """
+        if node is None:
+            return 0
+        if self._track_sizes:
+            return node._count
+        return sum(1 for _ in self._subtree_walk(node, 'preorder'))
+
+    def _empty_like(self):
+        """Return a new, empty tree configured like this one."""
+        return type(self)(cache_heights=self._cache_heights)
+
     #--------------------- public methods providing Binary Search Tree support ---------------------
     def first(self):
         """Return the first node (smallest node) in the tree (or None if empty)."""
@@ -328,6 +662,54 @@ class BinarySearchTree(Tree):
                 above = walk._parent
             return above
 
+    def _lower_bound(self, v, inclusive=True):
+        """Return the first node whose value is >= v (> v if not inclusive), or None."""
+        node = self._root
+        best = None
+        while node is not None:
+            if node._element > v or (inclusive and node._element == v):
+                best = node                       # candidate; look for a smaller one on the left
+                node = node._left
+            else:
+                node = node._right
+        return best
+
+    def _upper_bound(self, v, inclusive=True):
+        """Return the last node whose value is <= v (< v if not inclusive), or None."""
+        node = self._root
+        best = None
+        while node is not None:
+            if node._element < v or (inclusive and node._element == v):
+                best = node                       # candidate; look for a larger one on the right
+                node = node._right
+            else:
+                node = node._left
+        return best
+
+    def iter_range(self, start=None, stop=None, include_start=True, include_stop=False, reverse=False):
+        """Generate the values v with start <= v < stop, in order (in reverse order if reverse is True).
+
+        A bound of None means unbounded on that side; include_start/include_stop choose
+        whether each bound is inclusive. Only the path to the first value and the k
+        values reported are visited, so the cost is O(h + k) rather than O(n).
+        """
+        if self.is_empty():
+            return
+        if not reverse:
+            node = self.first() if start is None else self._lower_bound(start, include_start)
+            while node is not None:
+                if stop is not None and (node._element > stop or (node._element == stop and not include_stop)):
+                    break                         # walked past stop
+                yield node._element
+                node = self.after(node)
+        else:
+            node = self.last() if stop is None else self._upper_bound(stop, include_stop)
+            while node is not None:
+                if start is not None and (node._element < start or (node._element == start and not include_start)):
+                    break                         # walked past start
+                yield node._element
+                node = self.before(node)
+
     def delete(self, node):
         """Remove the given node."""
         if node._left and node._right:           # node has two children
@@ -341,15 +723,41 @@ class BinarySearchTree(Tree):
             
     #--------------------- public methods for accessing/mutating ---------------------
     def get_node(self, v):
-        """Return the node associated with value (raise Error if not found)."""
+        """Return the node associated with value (raise KeyError if not found)."""
         if self.is_empty():
             raise Empty('Tree is empty')
         else:
             node = self._subtree_search(self._root, v)
+            self._rebalance_access(node)                 # (This line only works in Splay Tree)
             if v != node._element:
-                raise Error('Not found: ' + repr(v))
+                raise KeyError('Not found: ' + repr(v))
             return node
 
+    def finger_search(self, hint, v):
+        """Return the node associated with value v, starting the search at node hint (raise KeyError if not found).
+
+        Climb from hint only until the subtree below covers v, then search downward, so
+        a key close to the previous one is found in about O(log d) steps (d = distance
+        in sorted order) instead of starting again from the root.
+        """
+        walk = hint
+        if v != walk._element:
+            go_right = walk._element < v
+            while walk._parent is not None:
+                above = walk._parent
+                if (walk == above._left) == go_right:     # above bounds the subtree on v's side
+                    if v == above._element:
+                        walk = above
+                        break
+                    if (v < above._element) == go_right:
+                        break                              # v lies inside walk's subtree range
+                walk = above
+            walk = self._subtree_search(walk, v)
+        self._rebalance_access(walk)                     # (This line only works in Splay Tree)
+        if v != walk._element:
+            raise KeyError('Not found: ' + repr(v))
+        return walk
+
     def insert(self, v):
         """Insert value v into the Binary Search Tree"""
         if self.is_empty():
@@ -363,13 +771,13 @@ class BinarySearchTree(Tree):
         self._rebalance_insert(leaf)                 # (This line only works in AVL Tree)
 
     def delete_value(self, v):
-        """Remove the node within the Tree that contains value v (raise Error if not found)."""
+        """Remove the node within the Tree that contains value v (raise KeyError if not found)."""
         if not self.is_empty():
             node = self._subtree_search(self._root, v)
             if v == node._element:
                 self.delete(node)                        # reuse the delete node function
                 return                                   # successful deletion complete
-        raise Error('Not found: ' + repr(v))
+        raise KeyError('Not found: ' + repr(v))
 
 
     def _rebalance_insert(self, p):     # Do nothing in BST, going to be overidden in AVLTree.
@@ -378,12 +786,245 @@ class BinarySearchTree(Tree):
     def _rebalance_delete(self, p):     # Do nothing in BST, going to be overidden in AVLTree.
         pass
 
+    def _rebalance_access(self, p):     # Do nothing in BST, going to be overidden in SplayTree.
+        pass
+
+    def _bulk_finish(self, node, depth, max_depth):   # Do nothing in BST, balanced trees fill in their node data.
+        pass
+
+    def _finish_root(self, root):       # Do nothing in BST, red-black trees make a new root black.
+        pass
+
+    #--------------------- bulk construction ---------------------
+    @classmethod
+    def from_iterable(cls, iterable):
+        """Return a new tree holding every value of iterable, built perfectly balanced."""
+        tree = cls()
+        tree.bulk_load(iterable)
+        return tree
+
+    def bulk_load(self, iterable):
+        """Fill an empty tree with every value of iterable, building a perfectly balanced tree.
+
+        The values are sorted first only if they are not already in order.
+        Total time is O(n) for sorted input (O(n log n) otherwise).
+        Raise ValueError if the tree is not empty.
+        """
+        if not self.is_empty():
+            raise ValueError('Tree is not empty')
+        values = list(iterable)
+        for i in range(1, len(values)):
+            if values[i] < values[i - 1]:        # out of order, so sort once
+                values.sort()
+                break
+        if values:
+            max_depth = len(values).bit_length() - 1     # depth of the deepest level
+            self._root = self._build_balanced(values, 0, len(values) - 1, None, 0, max_depth)
+        self._size = len(values)
+
+    def _build_balanced(self, values, lo, hi, parent, depth, max_depth):
+        """Link values[lo:hi+1] into a balanced subtree below parent, and return its root."""
+        mid = (lo + hi) // 2
+        node = self.TreeNode(values[mid], parent)
+        if lo < mid:
+            node._left = self._build_balanced(values, lo, mid - 1, node, depth + 1, max_depth)
+        if mid < hi:
+            node._right = self._build_balanced(values, mid + 1, hi, node, depth + 1, max_depth)
+        if self._cache_heights:
+            node._cached_height = self._fresh_height(node)
+        if self._track_sizes:
+            node._count = self._fresh_count(node)
+        self._bulk_finish(node, depth, max_depth)        # children are complete by now
+        return node
+
+    #--------------------- split and join ---------------------
+    def _split_nodes(self, root, key):
+        """Take the detached subtree at root apart around key.
+
+        Return (less, equal, greater): the roots of the subtrees holding the values < key
+        and > key, and a detached node holding key (or None if key is not present).
+        """
+        path = []
+        node = root
+        while node is not None and node._element != key:   # record the search path for key
+            path.append(node)
+            node = node._right if node._element < key else node._left
+        equal = node
+        left = right = None
+        if equal is not None:                            # its subtrees start the two halves
+            left, right = equal._left, equal._right
+            equal._left = equal._right = None
+            for child in (left, right):
+                if child is not None:
+                    child._parent = None
+        for node in reversed(path):                      # rejoin bottom-up
+            small, large = node._left, node._right
+            node._left = node._right = None
+            if node._element < key:                      # node and its left subtree go left
+                if small is not None:
+                    small._parent = None
+                left = self._join_nodes(small, node, left)
+            else:                                        # node and its right subtree go right
+                if large is not None:
+                    large._parent = None
+                right = self._join_nodes(right, node, large)
+        return left, equal, right
+
+    def _join2(self, left, right):
+        """Join detached subtrees left and right (all of left <= all of right) without a middle node."""
+        if left is None:
+            return right
+        if right is None:
+            return left
+        walk = left
+        while walk._right is not None:                   # largest value of left becomes the join key
+            walk = walk._right
+        less, mid, greater = self._split_nodes(left, walk._element)
+        if greater is not None:                          # only further copies of that same value
+            right = self._join2(greater, right)
+        return self._join_nodes(less, mid, right)
+
+    def split(self, key):
+        """Split the tree into a tree of the values < key and a tree of the values >= key.
+
+        Return (left_tree, right_tree), both of the same type as this tree.
+        As a side effect, set this tree to empty.
+        The search path is taken apart and rejoined bottom-up, which is O(h) joins;
+        for a balanced tree the joins telescope to O(log n) in total (the balanced
+        trees track subtree sizes, so the size of each half is O(1) to read).
+        """
+        left, equal, right = self._split_nodes(self._root, key)
+        if equal is not None:
+            right = self._join_nodes(None, equal, right)
+        left_tree, right_tree = self._empty_like(), self._empty_like()
+        left_tree._root, right_tree._root = left, right
+        for root in (left, right):
+            if root is not None:
+                self._finish_root(root)                  # a detached subtree root may not be a valid tree root
+        left_tree._size = self._subtree_size(left)
+        right_tree._size = len(self) - len(left_tree)
+        self._root = None                                # set this tree to empty
+        self._size = 0
+        return left_tree, right_tree
+
+    def join(self, other):
+        """Move every value of other into this tree; other's values must all be >= this tree's values.
+
+        As a side effect, set other to empty.
+        Raise TypeError if the trees do not have the same type.
+        Raise ValueError if other holds a value smaller than the largest value here.
+        Costs one delete plus one join: O(h).
+        """
+        if not type(self) is type(other):                # both trees must be same type
+            raise TypeError('Tree types must match')
+        if other.is_empty():
+            return
+        if not self.is_empty() and other.first()._element < self.last()._element:
+            raise ValueError('Trees overlap')
+        size = len(self) + len(other)
+        self._adopt(other)
+        if self.is_empty():
+            self._root = other._root
+        else:
+            mid = self.last()                            # largest value becomes the join key
+            self.delete(mid)
+            mid._parent = mid._left = mid._right = None
+            self._root = self._join_nodes(self._root, mid, other._root)
+        self._size = size
+        other._root = None                               # set other to empty
+        other._size = 0
+
+    #--------------------- set operations ---------------------
+    # Both trees are treated as sets. Each operation recurses on the root of one tree,
+    # splits the other tree around it, and joins the two recursive results. That is
+    # O(m log(n/m + 1)) for balanced trees of sizes m <= n. The recursive helpers return
+    # (root, number of values found in both trees), which is enough to know the result size.
+    def _union_nodes(self, a, b):
+        if a is None or b is None:
+            return (b if a is None else a), 0
+        small, large = a._left, a._right
+        a._left = a._right = None
+        for child in (small, large):
+            if child is not None:
+                child._parent = None
+        less, equal, greater = self._split_nodes(b, a._element)   # equal copy from b is dropped
+        left, found_left = self._union_nodes(small, less)
+        right, found_right = self._union_nodes(large, greater)
+        return self._join_nodes(left, a, right), found_left + found_right + (equal is not None)
+
+    def _intersection_nodes(self, a, b):
+        if a is None or b is None:
+            return None, 0
+        small, large = a._left, a._right
+        a._left = a._right = None
+        for child in (small, large):
+            if child is not None:
+                child._parent = None
+        less, equal, greater = self._split_nodes(b, a._element)
+        left, found_left = self._intersection_nodes(small, less)
+        right, found_right = self._intersection_nodes(large, greater)
+        if equal is not None:                            # a's value is in both trees
+            return self._join_nodes(left, a, right), found_left + found_right + 1
+        return self._join2(left, right), found_left + found_right
+
+    def _difference_nodes(self, a, b):
+        if a is None or b is None:
+            return a, 0
+        small, large = b._left, b._right
+        b._left = b._right = None
+        for child in (small, large):
+            if child is not None:
+                child._parent = None
+        less, equal, greater = self._split_nodes(a, b._element)   # equal copy from a is dropped
+        left, found_left = self._difference_nodes(less, small)
+        right, found_right = self._difference_nodes(greater, large)
+        return self._join2(left, right), found_left + found_right + (equal is not None)
+
+    def _set_operation(self, op, other):
+        """Run op ('union', 'intersection' or 'difference') on this tree and other, in place."""
+        if not type(self) is type(other):                # both trees must be same type
+            raise TypeError('Tree types must match')
+        if other is self:                                # the tree must not be emptied as "other"
+            if op == 'difference':
+                self._root = None
+                self._size = 0
+            return
+        size, other_size = len(self), len(other)
+        self._adopt(other)
+        root, found = getattr(self, '_' + op + '_nodes')(self._root, other._root)
+        if root is not None:
+            root._parent = None
+            self._finish_root(root)
+        self._root = root
+        if op == 'union':
+            self._size = size + other_size - found
+        elif op == 'intersection':
+            self._size = found
+        else:
+            self._size = size - found
+        other._root = None                               # set other to empty
+        other._size = 0
+
+    def union(self, other):
+        """Make this tree the union of itself and other.
+
+        As a side effect, set other to empty (unless other is this tree).
+        Raise TypeError if the trees do not have the same type.
+        """
+        self._set_operation('union', other)
+
+    def intersection(self, other):
+        """Keep only the values of this tree that are also in other (see union)."""
+        self._set_operation('intersection', other)
+
+    def difference(self, other):
+        """Remove the values of other from this tree (see union)."""
+        self._set_operation('difference', other)
+
     def __iter__(self):
         """Generate an iteration of all values in order."""
-        node = self.first()
-        while node is not None:
+        for node in self.inorder():
             yield node._element
-            node = self.after(node)
 
     def __reversed__(self):
         """Generate an iteration of all values in reverse order."""
@@ -393,3 +1034,99 @@ class BinarySearchTree(Tree):
             node = self.before(node)
 
 
+#----------------------------------- benchmarks -------------------------------
+def _nested_preorder(node):
+    """The old traversal: one nested generator per level (kept for comparison only)."""
+    yield node
+    for c in (node._left, node._right):
+        if c is not None:
+            for other in _nested_preorder(c):
+                yield other
+
+def benchmark_traversals():
+    """Compare nested-generator and explicit-stack preorder on degenerate and balanced trees."""
+    from time import perf_counter
+    for n in (500, 900, 10 ** 5):
+        chain = Tree()                                   # degenerate tree: a right-going chain
+        node = chain.add_root(0)
+        for i in range(1, n):
+            node = chain.add_right(node, i)
+        balanced = BinarySearchTree.from_iterable(range(n))
+        for name, tree, depth in (('degenerate', chain, n - 1), ('balanced', balanced, n.bit_length() - 1)):
+            start = perf_counter()
+            count = sum(1 for _ in tree.preorder())
+            stack_time = perf_counter() - start
+            if depth < 950:                              # deeper trees exceed the recursion limit
+                start = perf_counter()
+                sum(1 for _ in _nested_preorder(tree.root()))
+                nested = '%8.4f s' % (perf_counter() - start)
+            else:
+                nested = 'RecursionError'
+            print("%-10s n = %6d   explicit stack %8.4f s   nested generators %s" % (name, count, stack_time, nested))
+
+def benchmark_finger_search(n = 10 ** 5, queries = 10 ** 5):
+    """Compare root searches and finger searches for a stream of nearby keys (e.g. timestamps)."""
+    import random
+    from time import perf_counter
+    rng = random.Random(4)
+    tree = BinarySearchTree.from_iterable(range(n))
+    keys, k = [], 0
+    for _ in range(queries):                             # each key a few steps from the previous one
+        k = min(max(k + rng.randint(-3, 8), 0), n - 1)
+        keys.append(k)
+    start = perf_counter()
+    for k in keys:
+        tree.get_node(k)
+    root_time = perf_counter() - start
+    start = perf_counter()
+    node = tree.root()
+    for k in keys:
+        node = tree.finger_search(node, k)
+    finger_time = perf_counter() - start
+    print("n = %d   %d sequential lookups   from root %7.4f s   finger search %7.4f s"
+          % (n, queries, root_time, finger_time))
+
+def _lca_by_ancestors(node1, node2):
+    """The old LCA: list node1's ancestors, then test each ancestor of node2 (kept for comparison only)."""
+    node1_parents = []
+    while node1 != None:
+        node1_parents.append(node1)
+        node1 = node1._parent
+    while node2 != None:
+        if node2 in node1_parents:
+            return node2
+        node2 = node2._parent
+
+def benchmark_lca(n = 10 ** 5, queries = 10 ** 5):
+    """Compare repeated ancestor-list LCA calls, the offline lca_many and an LCAIndex on one batch of pairs."""
+    import random
+    from time import perf_counter
+    rng = random.Random(5)
+    tree = BinarySearchTree()
+    for v in rng.sample(range(n), n):                    # random insertion order: height about 3 log n
+        tree.insert(v)
+    nodes = list(tree.nodes())
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(queries)]
+    start = perf_counter()
+    expected = [_lca_by_ancestors(node1, node2) for node1, node2 in pairs]
+    naive_time = perf_counter() - start
+    start = perf_counter()
+    offline = tree.lca_many(pairs)
+    offline_time = perf_counter() - start
+    start = perf_counter()
+    indexed = tree.lca_index().query_many(pairs)
+    index_time = perf_counter() - start
+    assert offline == expected == indexed
+    print("n = %d   %d pairs   repeated LCA %7.3f s   lca_many %7.3f s   LCAIndex (incl. build) %7.3f s"
+          % (n, queries, naive_time, offline_time, index_time))
+
+def main():
+    print("#-------------------------- traversal benchmark --------------------------")
+    benchmark_traversals()
+    print("#-------------------------- finger search benchmark --------------------------")
+    benchmark_finger_search()
+    print("#-------------------------- LCA benchmark --------------------------")
+    benchmark_lca()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import threading
+from contextlib import contextmanager
+from ComplexTree import BinarySearchTree
+from AVLTree import AVLTree
+
+class ReadWriteLock:
+    """Lock that lets any number of readers in together, but a writer only alone.
+
+    Waiting writers get priority over new readers, so a steady stream of lookups
+    cannot starve the updating thread.
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0                   # number of readers holding the lock
+        self._writer = False                # True while a writer holds the lock
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()     # a writer may be waiting
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class ConcurrentTree:
+    """Thread-safe wrapper around a BinarySearchTree (an AVLTree by default).
+
+    Lookups take the read side of a ReadWriteLock and run in parallel; insert and
+    delete_value take the write side, so a rotation is always finished before any
+    reader can look at the tree. Values, not nodes, are handed out, since a node
+    can be changed by a writer as soon as the lock is released.
+    If the tree restructures itself on lookups (a SplayTree overrides
+    _rebalance_access), get takes the write side instead, so lookups on it are
+    serialized.
+    """
+    def __init__(self, tree = None, chunk = 256):
+        self._tree = tree if tree is not None else AVLTree()
+        self._lock = ReadWriteLock()
+        self._chunk = chunk                 # values read per lock hold while iterating
+        # get_node calls _rebalance_access, which rotates the tree unless it is the BST no-op
+        self._access_mutates = type(self._tree)._rebalance_access is not BinarySearchTree._rebalance_access
+
+    #-------------------------- readers --------------------------
+    def __len__(self):
+        with self._lock.read_locked():
+            return len(self._tree)
+
+    def is_empty(self):
+        return len(self) == 0
+
+    def __contains__(self, v):
+        with self._lock.read_locked():
+            if self._tree.is_empty():
+                return False
+            return self._tree._subtree_search(self._tree.root(), v)._element == v
+
+    def get(self, v):
+        """Return the stored value equal to v (raise KeyError if not found)."""
+        locked = self._lock.write_locked if self._access_mutates else self._lock.read_locked
+        with locked():
+            if self._tree.is_empty():
+                raise KeyError('Not found: ' + repr(v))
+            return self._tree.get_node(v)._element
+
+    def first(self):
+        """Return the smallest value (or None if empty)."""
+        with self._lock.read_locked():
+            node = self._tree.first()
+            return node._element if node is not None else None
+
+    def last(self):
+        """Return the largest value (or None if empty)."""
+        with self._lock.read_locked():
+            node = self._tree.last()
+            return node._element if node is not None else None
+
+    def iter_range(self, start = None, stop = None):
+        """Generate the values v with start <= v < stop, in order.
+
+        The values are read a chunk at a time, each chunk under the read lock, so an
+        iterator never sees a half-done update and never holds the lock while the
+        caller works. Each value is reported at most once; values inserted or deleted
+        by writers between chunks may or may not be seen.
+        """
+        include_start = True
+        while True:
+            with self._lock.read_locked():
+                chunk = []
+                for v in self._tree.iter_range(start, stop, include_start=include_start):
+                    chunk.append(v)
+                    if len(chunk) == self._chunk:
+                        break
+            for v in chunk:
+                yield v
+            if len(chunk) < self._chunk:
+                return
+            start, include_start = chunk[-1], False   # resume after the last value seen
+
+    def __iter__(self):
+        """Generate an iteration of all values in order (see iter_range)."""
+        return self.iter_range()
+
+    #-------------------------- writers --------------------------
+    def insert(self, v):
+        with self._lock.write_locked():
+            self._tree.insert(v)
+
+    def delete_value(self, v):
+        """Remove value v (raise KeyError if not found)."""
+        with self._lock.write_locked():
+            self._tree.delete_value(v)
+
+
+#----------------------------------- benchmark -------------------------------
+def benchmark_contention(thread_counts = (1, 2, 4, 8), n = 10 ** 5, seconds = 1.0):
+    """Run reader threads doing lookups against one writer thread; report throughput per thread count.
+
+    Under CPython's global interpreter lock the readers do not run truly in parallel,
+    so this mainly measures how much the locking costs and whether the writer keeps up.
+    """
+    import random
+    from time import perf_counter, sleep
+    tree = ConcurrentTree(AVLTree.from_iterable(range(0, 2 * n, 2)))     # even keys
+    for threads in thread_counts:
+        stop = threading.Event()
+        counts = [0] * (threads + 1)
+
+        def reader(i):
+            rng = random.Random(i)
+            while not stop.is_set():
+                (rng.randrange(2 * n) in tree)
+                counts[i] += 1
+
+        def writer():
+            rng = random.Random(-1)
+            while not stop.is_set():
+                v = 2 * rng.randrange(n) + 1                               # odd keys come and go
+                tree.insert(v)
+                tree.delete_value(v)
+                counts[threads] += 2
+
+        workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+        workers.append(threading.Thread(target=writer))
+        start = perf_counter()
+        for w in workers:
+            w.start()
+        sleep(seconds)
+        stop.set()
+        for w in workers:
+            w.join()
+        elapsed = perf_counter() - start
+        print("%2d readers   %10.0f lookups/s   %9.0f updates/s"
+              % (threads, sum(counts[:threads]) / elapsed, counts[threads] / elapsed))
+
+def main():
+    print("#-------------------------- reader/writer contention --------------------------")
+    benchmark_contention()
+
+if __name__ == '__main__':
+    main()
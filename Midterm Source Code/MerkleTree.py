@@ -0,0 +1,135 @@
+from hashlib import blake2b
+from ComplexTree import Tree
+
+class MerkleTree(Tree):
+    """Binary tree whose nodes also store a Merkle hash of their whole subtree.
+
+    A node's hash combines its element with its children's hashes, so two subtrees
+    with equal hashes hold the same elements in the same shape: comparing them is
+    O(1), and diff() only descends where the hashes differ. Every mutator rehashes
+    the path from the changed node up to the root, which is O(depth).
+    Elements are hashed through repr(); override _element_bytes for other types.
+    """
+
+    _DIGEST_SIZE = 16
+    _NO_CHILD = bytes(_DIGEST_SIZE)                # hash used for a missing child
+
+    class TreeNode(Tree.TreeNode):
+        """Node class that also stores the hash of its subtree."""
+        def __init__(self, element, parent = None, left = None, right = None):
+            super().__init__(element, parent, left, right)
+            self._hash = None
+
+    #------------------------------- hashing -------------------------------
+    def _element_bytes(self, e):
+        """Return the bytes that represent element e in the hashes."""
+        return repr(e).encode()
+
+    def _rehash(self, node):
+        """Recompute the hashes from node up to the root."""
+        while node is not None:
+            h = blake2b(digest_size=self._DIGEST_SIZE)
+            h.update(node._left._hash if node._left is not None else self._NO_CHILD)
+            h.update(node._right._hash if node._right is not None else self._NO_CHILD)
+            h.update(self._element_bytes(node._element))   # fixed-size child hashes come first
+            node._hash = h.digest()
+            node = node._parent
+
+    def subtree_hash(self, node):
+        """Return the hash of the subtree rooted at node (None for None)."""
+        return node._hash if node is not None else None
+
+    def root_hash(self):
+        """Return the hash of the whole tree (None if empty)."""
+        return self.subtree_hash(self._root)
+
+    def equals(self, other):
+        """Return True if other holds the same elements in the same shape (O(1))."""
+        return self.root_hash() == other.root_hash()
+
+    def diff(self, other):
+        """Return a list of (path, node, other_node) for every position where other differs.
+
+        path is a string of 'L'/'R' steps from the root. A position is reported if both
+        trees have a node there with different elements, or if only one tree has a
+        subtree there (the missing side is None, and the subtree is not entered).
+        Subtrees with equal hashes are skipped, so the cost is O(d * depth) for d changes.
+        """
+        result = []
+        stack = [('', self._root, other._root)]
+        while stack:
+            path, node, other_node = stack.pop()
+            if self.subtree_hash(node) == other.subtree_hash(other_node):
+                continue                                   # identical subtrees (or both missing)
+            if node is None or other_node is None:
+                result.append((path, node, other_node))
+                continue
+            if node._element != other_node._element:
+                result.append((path, node, other_node))
+            stack.append((path + 'R', node._right, other_node._right))
+            stack.append((path + 'L', node._left, other_node._left))
+        return result
+
+    #------------------------------- override mutators to rehash -------------------------------
+    def add_root(self, e):
+        node = super().add_root(e)
+        self._rehash(node)
+        return node
+
+    def add_left(self, node, e):
+        child = super().add_left(node, e)
+        self._rehash(child)
+        return child
+
+    def add_right(self, node, e):
+        child = super().add_right(node, e)
+        self._rehash(child)
+        return child
+
+    def _replace(self, node, e):
+        old = super()._replace(node, e)
+        self._rehash(node)
+        return old
+
+    def _delete(self, node):
+        e = super()._delete(node)
+        self._rehash(node._parent)                     # node still points to its old parent
+        return e
+
+    def _attach(self, node, t1, t2):
+        super()._attach(node, t1, t2)                  # attached subtrees already have their hashes
+        self._rehash(node)
+
+
+def main():
+    from time import perf_counter
+    n = 2 ** 17 - 1
+    replicas = []
+    for _ in range(2):                             # two replicas of the same complete tree
+        tree = MerkleTree()
+        level = [tree.add_root(0)]
+        count = 1
+        while count < n:
+            below = []
+            for node in level:
+                below.append(tree.add_left(node, count))
+                below.append(tree.add_right(node, count + 1))
+                count += 2
+            level = below
+        replicas.append((tree, level))
+    (a, leaves_a), (b, leaves_b) = replicas
+    print(a.equals(b), "    Expected result is True")
+    a._replace(leaves_a[5], 'changed')
+    a._replace(a.root()._right, 'also changed')
+    print("#-------------------------- diff of two replicas with %d nodes --------------------------" % n)
+    start = perf_counter()
+    changes = a.diff(b)
+    merkle_time = perf_counter() - start
+    start = perf_counter()
+    full = [(x, y) for x, y in zip(a.preorder(), b.preorder()) if x._element != y._element]
+    full_time = perf_counter() - start
+    print([(path, node._element) for path, node, _ in changes])
+    print("Merkle diff %8.5f s   full comparison %8.5f s   (%d differences)" % (merkle_time, full_time, len(full)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+class PersistentTree:
+    """Immutable, balanced Binary Search Tree.
+
+    insert and delete_value never change a tree; they return a new version that shares
+    every untouched node with the old one, copying only the O(log n) nodes on the search
+    path (kept balanced with the AVL rule). Because no version is ever mutated, a snapshot
+    is just the version itself, and versions nobody refers to anymore are reclaimed by
+    normal garbage collection. Nodes have no parent pointers, since a shared node can
+    have a different parent in every version.
+    """
+
+    #-------------------------- nested _Node class --------------------------
+    class _Node:
+        """Lightweight, nonpublic, never-modified node."""
+        __slots__ = '_element', '_left', '_right', '_height'     # streamline memory usage
+
+        def __init__(self, element, left = None, right = None):
+            self._element = element
+            self._left = left
+            self._right = right
+            self._height = 1 + max(left._height if left is not None else 0,
+                                   right._height if right is not None else 0)
+
+        def element(self):
+            return self._element
+
+    #-------------------------- constructor --------------------------
+    def __init__(self, root = None, size = 0):
+        """Create an empty tree (the arguments are only used to build new versions)."""
+        self._root = root
+        self._size = size
+
+    #-------------------------- public accessors --------------------------
+    def __len__(self):
+        """Return the total number of elements in the tree."""
+        return self._size
+
+    def is_empty(self):
+        """Return True if the tree is empty."""
+        return self._size == 0
+
+    def root(self):
+        """Return the root of the tree (or None if tree is empty)."""
+        return self._root
+
+    def snapshot(self):
+        """Return a version that later updates can never change: O(1), as this version is immutable."""
+        return self
+
+    def first(self):
+        """Return the first node (smallest node) in the tree (or None if empty)."""
+        node = self._root
+        while node is not None and node._left is not None:
+            node = node._left
+        return node
+
+    def last(self):
+        """Return the last node (largest node) in the tree (or None if empty)."""
+        node = self._root
+        while node is not None and node._right is not None:
+            node = node._right
+        return node
+
+    def get_node(self, v):
+        """Return the node associated with value (raise KeyError if not found)."""
+        node = self._root
+        while node is not None:
+            if v == node._element:
+                return node
+            node = node._left if v < node._element else node._right
+        raise KeyError('Not found: ' + repr(v))
+
+    def __contains__(self, v):
+        try:
+            self.get_node(v)
+            return True
+        except KeyError:
+            return False
+
+    def __iter__(self):
+        """Generate an iteration of all values in order."""
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:                  # walk down the left spine
+                stack.append(node)
+                node = node._left
+            node = stack.pop()
+            yield node._element
+            node = node._right
+
+    def __reversed__(self):
+        """Generate an iteration of all values in reverse order."""
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:                  # walk down the right spine
+                stack.append(node)
+                node = node._right
+            node = stack.pop()
+            yield node._element
+            node = node._left
+
+    #-------------------------- updates return new versions --------------------------
+    def insert(self, v):
+        """Return a new version of the tree that also holds value v."""
+        return PersistentTree(self._insert(self._root, v), self._size + 1)
+
+    def delete_value(self, v):
+        """Return a new version of the tree without value v (raise KeyError if not found)."""
+        return PersistentTree(self._delete(self._root, v), self._size - 1)
+
+    #-------------------------- nonpublic utilities --------------------------
+    def _height(self, node):
+        return node._height if node is not None else 0
+
+    def _balance(self, element, left, right):
+        """Return a new node for element over left and right, rotating if they differ in height by 2."""
+        Node = self._Node
+        if self._height(left) > self._height(right) + 1:
+            if self._height(left._left) >= self._height(left._right):     # single rotation
+                return Node(left._element, left._left, Node(element, left._right, right))
+            inner = left._right                                             # double rotation
+            return Node(inner._element, Node(left._element, left._left, inner._left),
+                        Node(element, inner._right, right))
+        if self._height(right) > self._height(left) + 1:
+            if self._height(right._right) >= self._height(right._left):   # single rotation
+                return Node(right._element, Node(element, left, right._left), right._right)
+            inner = right._left                                             # double rotation
+            return Node(inner._element, Node(element, left, inner._left),
+                        Node(right._element, inner._right, right._right))
+        return Node(element, left, right)
+
+    def _insert(self, node, v):
+        """Return a copy of the subtree at node with v added; untouched subtrees are shared."""
+        if node is None:
+            return self._Node(v)
+        if node._element < v:
+            return self._balance(node._element, node._left, self._insert(node._right, v))
+        else:
+            return self._balance(node._element, self._insert(node._left, v), node._right)
+
+    def _delete(self, node, v):
+        """Return a copy of the subtree at node with v removed; untouched subtrees are shared."""
+        if node is None:
+            raise KeyError('Not found: ' + repr(v))
+        if v == node._element:
+            if node._left is None:
+                return node._right
+            if node._right is None:
+                return node._left
+            left, replacement = self._delete_last(node._left)     # predecessor takes node's place
+            return self._balance(replacement, left, node._right)
+        if v < node._element:
+            return self._balance(node._element, self._delete(node._left, v), node._right)
+        else:
+            return self._balance(node._element, node._left, self._delete(node._right, v))
+
+    def _delete_last(self, node):
+        """Return (copy of the subtree at node without its largest value, that largest value)."""
+        if node._right is None:
+            return node._left, node._element
+        right, last = self._delete_last(node._right)
+        return self._balance(node._element, node._left, right), last
+
+
+def main():
+    v0 = PersistentTree()
+    v1 = v0
+    for i in range(10):
+        v1 = v1.insert(i)
+    snap = v1.snapshot()
+    v2 = v1.delete_value(3).insert(42)
+    print(list(snap), "    Expected result is", list(range(10)))
+    print(list(v2), "    Expected result is", [0, 1, 2, 4, 5, 6, 7, 8, 9, 42])
+    print(len(v0), len(v1), len(v2), "    Expected result is 0 10 10")
+
+if __name__ == '__main__':
+    main()
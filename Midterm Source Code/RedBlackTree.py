@@ -0,0 +1,223 @@
+from ComplexTree import BinarySearchTree
+from AVLTree import AVLTree
+
+class RedBlackTree(BinarySearchTree):
+    """Binary Search Tree that keeps itself balanced with the red-black coloring rules.
+
+    Each update does at most a constant number of rotations (two for insert, three
+    for delete), and the recolorings are O(1) amortized.
+    """
+
+    _track_sizes = True                   # subtree sizes keep split O(log n)
+
+    class TreeNode(BinarySearchTree.TreeNode):
+        """Node class that also stores one color bit."""
+        def __init__(self, element, parent = None, left = None, right = None):
+            super().__init__(element, parent, left, right)
+            self._red = True              # new node red by default
+
+    #------------------------------- positional-based utility methods -------------------------------
+    # we consider a nonexistent child to be trivially black
+    def _set_red(self, node):
+        node._red = True
+
+    def _set_black(self, node):
+        node._red = False
+
+    def _set_color(self, node, make_red):
+        node._red = make_red
+
+    def _is_red(self, node):
+        return node is not None and node._red
+
+    def _is_red_leaf(self, node):
+        return self._is_red(node) and self.is_leaf(node)
+
+    def _get_red_child(self, node):
+        """Return a red child of node (or None if no such child)."""
+        for child in (node._left, node._right):
+            if self._is_red(child):
+                return child
+        return None
+
+    #------------------------------- support for insertions -------------------------------
+    def _rebalance_insert(self, node):
+        self._resolve_red(node)                    # new node is always red
+
+    def _resolve_red(self, node):
+        if self.is_root(node):
+            self._set_black(node)                  # make root black
+        else:
+            parent = node._parent
+            if self._is_red(parent):               # double red problem
+                uncle = self.sibling(parent)
+                if not self._is_red(uncle):        # Case 1: misshapen 4-node
+                    middle = self._restructure(node)   # do trinode restructuring
+                    self._set_black(middle)        # and then fix colors
+                    self._set_red(middle._left)
+                    self._set_red(middle._right)
+                else:                              # Case 2: overfull 5-node
+                    grand = parent._parent
+                    self._set_red(grand)           # grandparent becomes red
+                    self._set_black(grand._left)   # its children become black
+                    self._set_black(grand._right)
+                    self._resolve_red(grand)       # recur at red grandparent
+
+    #------------------------------- support for deletions -------------------------------
+    def _rebalance_delete(self, node):
+        if len(self) == 1:
+            self._set_black(self.root())           # special case: ensure that root is black
+        elif node is not None:
+            n = self.num_children(node)
+            if n == 1:                             # deficit exists unless child is a red leaf
+                c = next(self.children(node))
+                if not self._is_red_leaf(c):
+                    self._fix_deficit(node, c)
+            elif n == 2:                           # removed black node with red child
+                if self._is_red_leaf(node._left):
+                    self._set_black(node._left)
+                else:
+                    self._set_black(node._right)
+
+    def _fix_deficit(self, z, y):
+        """Resolve black deficit at z, where y is the root of z's heavier subtree."""
+        if not self._is_red(y):                    # y is black; will apply Case 1 or 2
+            x = self._get_red_child(y)
+            if x is not None:                      # Case 1: y is black and has red child x; do "transfer"
+                old_color = self._is_red(z)
+                middle = self._restructure(x)
+                self._set_color(middle, old_color) # middle gets old color of z
+                self._set_black(middle._left)      # children become black
+                self._set_black(middle._right)
+            else:                                  # Case 2: y is black, but no red children; recolor as "fusion"
+                self._set_red(y)
+                if self._is_red(z):
+                    self._set_black(z)             # this resolves the problem
+                elif not self.is_root(z):
+                    self._fix_deficit(z._parent, self.sibling(z))   # recur upward
+        else:                                      # Case 3: y is red; rotate misaligned 3-node and repeat
+            self._rotate(y)
+            self._set_black(y)
+            self._set_red(z)
+            if z == y._left:
+                self._fix_deficit(z, z._right)
+            else:
+                self._fix_deficit(z, z._left)
+
+    #------------------------------- support for bulk construction -------------------------------
+    def _bulk_finish(self, node, depth, max_depth):
+        # A balanced build only leaves nodes on the deepest level when it is not full;
+        # coloring that level red keeps the black depth equal on every path.
+        self._set_color(node, depth == max_depth and depth > 0)
+
+    #------------------------------- support for split and join -------------------------------
+    def _finish_root(self, root):
+        self._set_black(root)                  # a red subtree root would break _resolve_red
+
+    def _black_height(self, node):
+        """Return the number of black nodes on any path from node down to a missing child."""
+        count = 0
+        while node is not None:
+            if not node._red:
+                count += 1
+            node = node._left
+        return count
+
+    def _join_nodes(self, left, mid, right):
+        """Join by black height: hang red mid on the spine of the taller side, then fix double reds."""
+        for root in (left, right):
+            if root is not None:
+                self._set_black(root)              # a black root keeps the subtree valid
+        bl, br = self._black_height(left), self._black_height(right)
+        if bl == br:                               # same black height: mid becomes the black root
+            super()._join_nodes(left, mid, right)
+            self._set_black(mid)
+            return mid
+        taller_left = bl > br
+        root = left if taller_left else right
+        target = br if taller_left else bl
+        level = bl if taller_left else br
+        parent = None
+        walk = root                                # find a black node on the inner spine at the target black height
+        while walk is not None and (walk._red or level > target):
+            if not walk._red:
+                level -= 1
+            parent = walk
+            walk = walk._right if taller_left else walk._left
+        if walk is not None:
+            walk._parent = None
+        if taller_left:
+            super()._join_nodes(walk, mid, right)
+        else:
+            super()._join_nodes(left, mid, walk)
+        self._set_red(mid)
+        self._relink(parent, mid, not taller_left)
+        self._update_sizes(parent)                 # the spine above mid gained its nodes
+        saved = self._root                         # resolve any double red inside the joined subtree
+        self._root = root
+        self._resolve_red(mid)
+        root = self._root
+        self._root = saved
+        self._set_black(root)
+        return root
+
+
+#----------------------------------- benchmark -------------------------------
+def _counting(tree_class):
+    """Return a subclass of tree_class that counts the rotations it performs."""
+    class Counting(tree_class):
+        rotations = 0
+        def _rotate(self, x):
+            Counting.rotations += 1
+            super()._rotate(x)
+    Counting.__name__ = tree_class.__name__
+    return Counting
+
+def benchmark(tree_class, keys):
+    """Insert, look up, then delete every key; return seconds per phase and the rotation count."""
+    from time import perf_counter
+    tree_class = _counting(tree_class)
+    tree = tree_class()
+    start = perf_counter()
+    for k in keys:
+        tree.insert(k)
+    inserted = perf_counter()
+    for k in keys:
+        tree.get_node(k)
+    looked_up = perf_counter()
+    for k in keys:
+        tree.delete_value(k)
+    deleted = perf_counter()
+    return inserted - start, looked_up - inserted, deleted - looked_up, tree_class.rotations
+
+def main():
+    import random
+    n = 10 ** 5
+    keys = list(range(n))
+    random.shuffle(keys)
+    print("#-------------------------- %d random keys: insert / lookup / delete --------------------------" % n)
+    for tree_class in (BinarySearchTree, AVLTree, RedBlackTree):
+        ins, look, dele, rotations = benchmark(tree_class, keys)
+        print("%-18s insert %6.3f s   lookup %6.3f s   delete %6.3f s   rotations %d"
+              % (tree_class.__name__, ins, look, dele, rotations))
+
+    # sorted input is where the unbalanced tree degenerates, so it is left out here
+    print("#-------------------------- %d sorted keys: insert / lookup / delete --------------------------" % n)
+    keys.sort()
+    for tree_class in (AVLTree, RedBlackTree):
+        ins, look, dele, rotations = benchmark(tree_class, keys)
+        print("%-18s insert %6.3f s   lookup %6.3f s   delete %6.3f s   rotations %d"
+              % (tree_class.__name__, ins, look, dele, rotations))
+
+    print("#-------------------------- split, then insert into both halves --------------------------")
+    tree = RedBlackTree()
+    tree.insert(13)
+    tree.insert(9)                           # red child, which becomes the left half's root
+    left, right = tree.split(13)
+    left.insert(8)
+    right.insert(14)
+    print(list(left), list(right), left.root()._red or right.root()._red,
+          "    Expected result is [8, 9] [13, 14] False")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import random
+
+class SkipList:
+    """Ordered container with the BinarySearchTree interface, built on an indexable skip list.
+
+    Every node is given a random number of levels, so searches skip ahead level by level
+    in expected O(log n) steps and updates only relink a few neighbours; there are no
+    rotations. Each link also stores its width (how many positions it jumps), which
+    makes positional access (self[i]) O(log n) as well.
+    """
+
+    _MAX_LEVEL = 32                          # enough for 2^32 values
+
+    #-------------------------- nested _Node class --------------------------
+    class _Node:
+        """Lightweight, nonpublic class for storing a skip list node."""
+        __slots__ = '_element', '_next', '_width', '_prev'     # streamline memory usage
+
+        def __init__(self, element, levels):
+            self._element = element
+            self._next = [None] * levels     # next node on each level
+            self._width = [1] * levels       # positions jumped by each link
+            self._prev = None                # previous node on the bottom level
+
+        def element(self):
+            return self._element
+
+    #-------------------------- constructor --------------------------
+    def __init__(self):
+        """Create an initially empty skip list."""
+        self._head = self._Node(None, self._MAX_LEVEL)
+        self._level = 1                      # number of levels in use
+        self._size = 0
+
+    #-------------------------- public accessors --------------------------
+    def __len__(self):
+        """Return the total number of elements."""
+        return self._size
+
+    def is_empty(self):
+        """Return True if the skip list is empty."""
+        return self._size == 0
+
+    def _search(self, v):
+        """Return the last node on each level whose value is < v (the head if none)."""
+        update = [None] * self._level
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node._next[i] is not None and node._next[i]._element < v:
+                node = node._next[i]
+            update[i] = node
+        return update
+
+    def get_node(self, v):
+        """Return the node associated with value (raise KeyError if not found)."""
+        node = self._search(v)[0]._next[0]
+        if node is None or node._element != v:
+            raise KeyError('Not found: ' + repr(v))
+        return node
+
+    def first(self):
+        """Return the first node (smallest node) (or None if empty)."""
+        return self._head._next[0]
+
+    def last(self):
+        """Return the last node (largest node) (or None if empty)."""
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node._next[i] is not None:
+                node = node._next[i]
+        return node if node is not self._head else None
+
+    def before(self, node):
+        """Return the node just before the given node (or None if it is the first)."""
+        return node._prev
+
+    def after(self, node):
+        """Return the node just after the given node (or None if it is the last)."""
+        return node._next[0]
+
+    def __getitem__(self, i):
+        """Return the value at position i in sorted order (negative i counts from the end)."""
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError('index out of range')
+        remaining = i + 1                    # positions still to move right of the head
+        node = self._head
+        for level in reversed(range(self._level)):
+            while node._next[level] is not None and node._width[level] <= remaining:
+                remaining -= node._width[level]
+                node = node._next[level]
+        return node._element
+
+    def __iter__(self):
+        """Generate an iteration of all values in order."""
+        node = self._head._next[0]
+        while node is not None:
+            yield node._element
+            node = node._next[0]
+
+    def __reversed__(self):
+        """Generate an iteration of all values in reverse order."""
+        node = self.last()
+        while node is not None:
+            yield node._element
+            node = node._prev
+
+    #-------------------------- mutators --------------------------
+    def _random_level(self):
+        level = 1
+        while level < self._MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, v):
+        """Insert value v (after any equal values)."""
+        level = self._random_level()
+        head = self._head
+        if level > self._level:              # links of unused levels jump to the end
+            for i in range(self._level, level):
+                head._width[i] = self._size + 1
+            self._level = level
+        update = [None] * self._level
+        steps = [0] * self._level            # position of update[i]
+        node, position = head, 0
+        for i in reversed(range(self._level)):
+            while node._next[i] is not None and node._next[i]._element <= v:
+                position += node._width[i]
+                node = node._next[i]
+            update[i], steps[i] = node, position
+        new = self._Node(v, level)
+        position += 1                        # position of the new node
+        for i in range(level):               # splice in, splitting each width around the new node
+            prev = update[i]
+            new._next[i] = prev._next[i]
+            prev._next[i] = new
+            new._width[i] = prev._width[i] - (position - steps[i]) + 1
+            prev._width[i] = position - steps[i]
+        for i in range(level, self._level):  # higher links now jump over one more node
+            update[i]._width[i] += 1
+        new._prev = update[0] if update[0] is not head else None
+        if new._next[0] is not None:
+            new._next[0]._prev = new
+        self._size += 1
+        return new
+
+    def delete_value(self, v):
+        """Remove one node holding value v (raise KeyError if not found)."""
+        update = self._search(v)
+        target = update[0]._next[0]
+        if target is None or target._element != v:
+            raise KeyError('Not found: ' + repr(v))
+        for i in range(self._level):
+            if update[i]._next[i] is target:  # unlink, merging the two widths
+                update[i]._width[i] += target._width[i] - 1
+                update[i]._next[i] = target._next[i]
+            else:
+                update[i]._width[i] -= 1
+        if target._next[0] is not None:
+            target._next[0]._prev = target._prev
+        self._size -= 1
+        while self._level > 1 and self._head._next[self._level - 1] is None:
+            self._level -= 1                 # drop levels that became empty
+
+
+#----------------------------------- benchmark -------------------------------
+def benchmark_mixed(container_class, initial, operations):
+    """Fill a container with initial values, then run (kind, value) operations; return seconds."""
+    from time import perf_counter
+    container = container_class()
+    for v in initial:
+        container.insert(v)
+    start = perf_counter()
+    for kind, v in operations:
+        if kind == 'get':
+            container.get_node(v)
+        elif kind == 'insert':
+            container.insert(v)
+        else:
+            container.delete_value(v)
+    return perf_counter() - start
+
+def main():
+    from ComplexTree import BinarySearchTree
+    from AVLTree import AVLTree
+    from RedBlackTree import RedBlackTree
+    n = 10 ** 5
+    rng = random.Random(1)
+    initial = rng.sample(range(10 * n), n)
+    present = list(initial)
+    absent = set(range(10 * n)) - set(initial)
+    operations = []                          # 80% lookups, 10% inserts, 10% deletes
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.8:
+            operations.append(('get', present[rng.randrange(len(present))]))
+        elif r < 0.9:
+            v = absent.pop()
+            present.append(v)
+            operations.append(('insert', v))
+        else:
+            i = rng.randrange(len(present))
+            present[i], present[-1] = present[-1], present[i]
+            operations.append(('delete', present.pop()))
+    print("#-------------------------- %d mixed operations on %d values --------------------------" % (n, n))
+    for container_class in (BinarySearchTree, AVLTree, RedBlackTree, SkipList):
+        seconds = benchmark_mixed(container_class, initial, operations)
+        print("%-18s %7.3f s   %9.0f ops/s" % (container_class.__name__, seconds, n / seconds))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+from ComplexTree import BinarySearchTree
+
+class SplayTree(BinarySearchTree):
+    """Self-adjusting Binary Search Tree: every accessed node is rotated up to the root.
+
+    Frequently requested values therefore stay near the root and are found in a few
+    steps; any sequence of operations costs O(log n) amortized per operation.
+    """
+
+    #------------------------------- splay operation -------------------------------
+    def _splay(self, node):
+        while node != self._root:
+            parent = node._parent
+            grand = parent._parent
+            if grand is None:
+                # zig case
+                self._rotate(node)
+            elif (parent == grand._left) == (node == parent._left):
+                # zig-zig case
+                self._rotate(parent)               # move PARENT up
+                self._rotate(node)                 # then move node up
+            else:
+                # zig-zag case
+                self._rotate(node)                 # move node up
+                self._rotate(node)                 # move node up again
+
+    #---------------------------- override balancing hooks ----------------------------
+    def _rebalance_insert(self, node):
+        self._splay(node)
+
+    def _rebalance_delete(self, node):
+        if node is not None:
+            self._splay(node)                      # splay the parent of the removed node
+
+    def _rebalance_access(self, node):
+        self._splay(node)                          # found node, or last node of a failed search
+
+
+#----------------------------------- benchmark -------------------------------
+class _CountedKey:
+    """Key wrapper that counts how often keys are compared."""
+    comparisons = 0
+    __slots__ = '_v'
+
+    def __init__(self, v):
+        self._v = v
+
+    def __eq__(self, other):
+        _CountedKey.comparisons += 1
+        return self._v == other._v
+
+    def __ne__(self, other):
+        _CountedKey.comparisons += 1
+        return self._v != other._v
+
+    def __lt__(self, other):
+        _CountedKey.comparisons += 1
+        return self._v < other._v
+
+    def __gt__(self, other):
+        _CountedKey.comparisons += 1
+        return self._v > other._v
+
+def zipf_lookups(keys, count, s = 1.1, seed = 1):
+    """Return count keys drawn with a Zipf(s) distribution over a random ranking of keys."""
+    import random
+    rng = random.Random(seed)
+    ranked = list(keys)
+    rng.shuffle(ranked)                            # the hot keys are spread over the key range
+    weights = [1.0 / (rank ** s) for rank in range(1, len(ranked) + 1)]
+    return rng.choices(ranked, weights=weights, k=count)
+
+def main():
+    import random
+    from time import perf_counter
+    from AVLTree import AVLTree
+    from RedBlackTree import RedBlackTree
+    n = 10 ** 5
+    keys = [_CountedKey(v) for v in range(n)]
+    insert_order = list(keys)
+    random.Random(2).shuffle(insert_order)
+    lookups = zipf_lookups(keys, 2 * n)
+    print("#-------------------------- %d Zipf lookups over %d keys --------------------------" % (len(lookups), n))
+    for tree_class in (BinarySearchTree, AVLTree, RedBlackTree, SplayTree):
+        tree = tree_class()
+        for k in insert_order:
+            tree.insert(k)
+        _CountedKey.comparisons = 0
+        start = perf_counter()
+        for k in lookups:
+            tree.get_node(k)
+        seconds = perf_counter() - start
+        print("%-18s %6.2f comparisons/lookup   %7.3f s"
+              % (tree_class.__name__, _CountedKey.comparisons / len(lookups), seconds))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import random
+from ComplexTree import BinarySearchTree
+
+class Treap(BinarySearchTree):
+    """Randomized Binary Search Tree: a BST by value and a max-heap by a random priority.
+
+    Because the priorities are random, the shape is that of a BST built from a random
+    insertion order, whatever order the values actually arrive in: expected O(log n)
+    depth with no balance bookkeeping. Split and merge are expected O(log n) as well.
+    """
+
+    class TreeNode(BinarySearchTree.TreeNode):
+        """Node class that also stores a random priority."""
+        def __init__(self, element, parent = None, left = None, right = None):
+            super().__init__(element, parent, left, right)
+            self._priority = random.random()
+
+    _track_sizes = True                            # subtree sizes keep split O(log n)
+
+    #---------------------------- override balancing hooks ----------------------------
+    def _rebalance_insert(self, node):
+        while node._parent is not None and node._parent._priority < node._priority:
+            self._rotate(node)                     # bubble up until the heap order holds
+
+    def delete(self, node):
+        """Remove the given node: rotate it down below its higher-priority child until it has one child."""
+        while node._left is not None and node._right is not None:
+            if node._left._priority > node._right._priority:
+                self._rotate(node._left)
+            else:
+                self._rotate(node._right)
+        parent = node._parent
+        self._delete(node)
+        self._rebalance_delete(parent)
+
+    def _bulk_finish(self, node, depth, max_depth):
+        # deeper levels get smaller priorities, so the balanced build is a valid heap
+        node._priority = 1 - (depth + random.random()) / (max_depth + 1)
+
+    #---------------------------- split and merge ----------------------------
+    def _merge(self, a, b):
+        """Merge detached subtrees a and b (all of a <= all of b) by priority, and return the root."""
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if a._priority > b._priority:              # a stays on top; merge into its right spine
+            self._relink(a, self._merge(a._right, b), False)
+            return a
+        else:                                      # b stays on top; merge into its left spine
+            self._relink(b, self._merge(a, b._left), True)
+            return b
+
+    def _join_nodes(self, left, mid, right):
+        mid._parent = mid._left = mid._right = None
+        self._update_sizes(mid)                    # mid is a leaf now
+        self._update_cache(mid)
+        root = self._merge(self._merge(left, mid), right)
+        root._parent = None
+        return root
+
+    def _join2(self, left, right):
+        root = self._merge(left, right)
+        if root is not None:
+            root._parent = None
+        return root
+
+    def merge(self, other):
+        """Move every value of other into this tree (see join); expected O(log n)."""
+        self.join(other)
+
+
+def main():
+    from time import perf_counter
+    from AVLTree import AVLTree
+    print("#-------------------------- nearly sorted insert --------------------------")
+    rng = random.Random(3)
+    n = 10 ** 5
+    keys = list(range(n))
+    for _ in range(n // 100):                      # a few local swaps
+        i = rng.randrange(n - 1)
+        keys[i], keys[i + 1] = keys[i + 1], keys[i]
+    for tree_class in (Treap, AVLTree):
+        tree = tree_class()
+        start = perf_counter()
+        for k in keys:
+            tree.insert(k)
+        seconds = perf_counter() - start
+        print("%-10s n = %d   %6.3f s   height %d" % (tree_class.__name__, n, seconds, tree.height()))
+    print("#-------------------------- split and merge --------------------------")
+    left, right = Treap.from_iterable(range(n)).split(n // 2)
+    left.merge(right)
+    print(len(left), len(right), "    Expected result is", n, 0)
+
+if __name__ == '__main__':
+    main()